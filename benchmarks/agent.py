@@ -0,0 +1,87 @@
+"""
+Chat agent turn latency.
+
+Runs `services.flight_agent.FlightAgent` against the offline stub model, so it needs no Vertex AI
+credentials. Each turn asks for several flight searches at once, which the model answers with one
+function call per search, then streams a text summary. The turn is measured twice:
+- serial: function calls run one after another and the answer is read as one block, like the
+  original agent
+- parallel + streaming: function calls run concurrently and text is shown as its first chunk arrives
+
+Tool calls go to the flight API in process against a scratch database, plus --tool-latency seconds
+per call to stand in for the network round trip to an API server. Reports the time to the first
+visible text and to the complete answer.
+
+Usage (from the repository root):
+    python -m benchmarks.agent --searches 4 --tool-latency 0.2 --model-latency 0.5
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import BENCHMARK_ROUTES, BENCHMARK_START_DATE, create_scratch_database, remove_scratch_database, seed_flights
+from services.flight_agent import TOOL_FUNCTIONS, FlightAgent
+from services.flight_client import InProcessFlightSearchClient
+from services.stub_model import StubGenerativeModel
+import services.flight_client as flight_client
+
+class SerialFlightAgent(FlightAgent):
+    def run_function_calls(self, calls):
+        return [self.call_function(name, args) for name, args in calls]
+
+def with_latency(function, seconds):
+    def call(**params):
+        time.sleep(seconds)
+        return function(**params)
+    return call
+
+def measure_turn(agent, message, streaming):
+    started = time.perf_counter()
+    first_text = None
+
+    for _ in agent.send(message):
+        if first_text is None:
+            first_text = time.perf_counter()
+
+    finished = time.perf_counter()
+    # Without streaming, nothing is shown until the whole answer is in
+    first_text = first_text if streaming else finished
+
+    return (first_text - started) * 1000, (finished - started) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, default=4, help="Flight searches requested per turn")
+    parser.add_argument("--tool-latency", type=float, default=0.2, help="Seconds added to each tool call")
+    parser.add_argument("--model-latency", type=float, default=0.5, help="Stub model seconds to first chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="Stub model seconds between text chunks")
+    parser.add_argument("--flights", type=int, default=2000, help="Flights to seed into the scratch database")
+    parser.add_argument("--turns", type=int, default=3)
+    args = parser.parse_args()
+
+    database_url, engine, session_factory = create_scratch_database()
+    seed_flights(session_factory, args.flights)
+    # Tool functions reach the scratch database in process
+    flight_client.FLIGHT_API_TRANSPORT = "inprocess"
+    flight_client._default_client = InProcessFlightSearchClient(session_factory)
+
+    routes = [BENCHMARK_ROUTES[index % len(BENCHMARK_ROUTES)] for index in range(args.searches)]
+    message = " and ".join(f"{origin} to {destination} on {BENCHMARK_START_DATE}" for origin, destination in routes)
+    functions = {name: with_latency(function, args.tool_latency) for name, function in TOOL_FUNCTIONS.items()}
+    model = StubGenerativeModel(latency=args.model_latency, chunk_delay=args.chunk_delay)
+
+    try:
+        print(f"{'mode':<22} {'first text ms':>14} {'complete ms':>12}")
+        for label, agent_class, streaming in (("serial", SerialFlightAgent, False), ("parallel + streaming", FlightAgent, True)):
+            agent = agent_class(model.start_chat(), functions=functions, function_response=model.function_response)
+            timings = [measure_turn(agent, message, streaming) for _ in range(args.turns)]
+            first_text = statistics.median(timing[0] for timing in timings)
+            complete = statistics.median(timing[1] for timing in timings)
+            print(f"{label:<22} {first_text:>14.0f} {complete:>12.0f}")
+    finally:
+        flight_client._default_client = None
+        engine.dispose()
+        remove_scratch_database(database_url)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Load benchmark comparing the sync endpoints with their /async counterparts.
+
+Seeds a scratch database, starts the API with uvicorn against it, then drives the sync and async
+search and booking endpoints with the same number of concurrent clients and reports RPS and
+p50/p99 latency for each.
+
+Usage (from the repository root):
+    python -m benchmarks.async_vs_sync --flights 50000 --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import (
+    BENCHMARK_ROUTES,
+    BENCHMARK_START_DATE,
+    create_scratch_database,
+    free_port,
+    latency_summary,
+    seed_flights,
+    start_api_server,
+    stop_api_server
+)
+
+def search_request(prefix, max_flight_id):
+    origin, destination = random.choice(BENCHMARK_ROUTES)
+    return "GET", f"{prefix}/search-flights/", {
+        "origin": origin,
+        "destination": destination,
+        "departure_date": BENCHMARK_START_DATE.isoformat(),
+        "page": random.randint(1, 5),
+        "page_size": 10
+    }
+
+def book_request(prefix, max_flight_id):
+    return "POST", f"{prefix}/book_flight", {
+        "flight_id": random.randint(1, max_flight_id),
+        "seat_type": "economy"
+    }
+
+async def drive(base_url, make_request, prefix, max_flight_id, concurrency, duration):
+    latencies = []
+    failures = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal failures
+            while time.perf_counter() < deadline:
+                method, path, params = make_request(prefix, max_flight_id)
+                started = time.perf_counter()
+                response = await client.request(method, path, params=params)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    summary = latency_summary(latencies)
+    summary["rps"] = len(latencies) / elapsed
+    summary["failures"] = failures
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="flights-bench-")
+    database_url, engine, session_factory = create_scratch_database(workdir, "flights.db")
+    seed_flights(session_factory, args.flights)
+    engine.dispose()
+
+    port = free_port()
+    server = start_api_server(workdir, port)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        print(f"{'scenario':<14} {'rps':>8} {'p50 ms':>8} {'p99 ms':>8} {'failures':>8}")
+        for name, make_request in (("search", search_request), ("book", book_request)):
+            for mode, prefix in (("sync", ""), ("async", "/async")):
+                result = asyncio.run(drive(base_url, make_request, prefix, args.flights, args.concurrency, args.duration))
+                print(f"{name + ' ' + mode:<14} {result['rps']:>8.0f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['failures']:>8}")
+    finally:
+        stop_api_server(server)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
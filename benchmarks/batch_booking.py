@@ -0,0 +1,101 @@
+"""
+Batch booking throughput.
+
+Books the same number of legs through the FastAPI app (in process, via TestClient), once with one
+`/book_flight` call per leg and once through `/book_flights` with increasing batch sizes, and
+reports legs booked per second. Afterwards it checks that the seats taken from the database match
+the seats booked.
+
+Usage (from the repository root):
+    python -m benchmarks.batch_booking --legs 2000 --batch-sizes 1 5 20 100
+"""
+import argparse
+import random
+import sys
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from models import Flight
+from benchmarks.common import app_database, create_scratch_database, remove_scratch_database, seed_flights
+
+SEATS_PER_FLIGHT = 1000
+
+def total_open_seats(session_factory):
+    with session_factory() as db:
+        return db.query(func.sum(Flight.open_seats_economy + Flight.open_seats_business + Flight.open_seats_first_class)).scalar()
+
+def random_legs(count, num_flights):
+    return [
+        {"flight_id": random.randint(1, num_flights), "seat_type": random.choice(["economy", "business", "first_class"]), "num_seats": 1}
+        for _ in range(count)
+    ]
+
+def book_one_by_one(client, legs):
+    for leg in legs:
+        response = client.post("/book_flight", params=leg)
+        response.raise_for_status()
+
+def book_in_batches(client, legs, batch_size):
+    for start in range(0, len(legs), batch_size):
+        response = client.post("/book_flights", json={"legs": legs[start:start + batch_size]})
+        response.raise_for_status()
+        if not isinstance(response.json()["message"], dict):
+            raise RuntimeError(f"Batch booking failed: {response.json()['message']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, default=1000, help="Flights to seed")
+    parser.add_argument("--legs", type=int, default=2000, help="Legs booked per run")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 5, 20, 100])
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    database_url, engine, session_factory = create_scratch_database()
+
+    from main import app
+
+    try:
+        seed_flights(session_factory, args.flights)
+        with session_factory() as db:
+            # Enough seats that no run sells out
+            db.query(Flight).update({Flight.open_seats_economy: SEATS_PER_FLIGHT, Flight.open_seats_business: SEATS_PER_FLIGHT, Flight.open_seats_first_class: SEATS_PER_FLIGHT})
+            db.commit()
+
+        seats_before = total_open_seats(session_factory)
+        legs_booked = 0
+
+        print(f"{'mode':<16} {'requests':>9} {'legs/s':>10} {'seconds':>9}")
+        with app_database(engine, session_factory), TestClient(app) as client:
+            runs = [("single", None)] + [(f"batch of {size}", size) for size in args.batch_sizes]
+
+            for name, batch_size in runs:
+                legs = random_legs(args.legs, args.flights)
+                started = time.perf_counter()
+                if batch_size is None:
+                    book_one_by_one(client, legs)
+                    requests = len(legs)
+                else:
+                    book_in_batches(client, legs, batch_size)
+                    requests = (len(legs) + batch_size - 1) // batch_size
+                elapsed = time.perf_counter() - started
+
+                legs_booked += len(legs)
+                print(f"{name:<16} {requests:>9} {len(legs) / elapsed:>10.0f} {elapsed:>9.2f}")
+
+        seats_taken = seats_before - total_open_seats(session_factory)
+    finally:
+        engine.dispose()
+        remove_scratch_database(database_url)
+
+    if seats_taken != legs_booked:
+        print(f"FAILED: {legs_booked} seats booked but {seats_taken} taken from the database")
+        return 1
+
+    print(f"OK: {seats_taken} seats booked and taken from the database")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Concurrent booking stress test.
+
+Many threads book seats on the same few flights until they sell out, each with its own session,
+the way concurrent API workers would. Afterwards it checks that no flight was oversold: the seats
+booked per flight must equal its starting inventory and no open seat count may be negative.
+
+Usage (from the repository root):
+    python -m benchmarks.booking_stress --threads 32 --flights 4 --seats 500
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+from models import Flight, FlightInput
+from services.flight_manager import generate_flights, handle_flight_book
+from benchmarks.common import BENCHMARK_SEED, create_scratch_database, latency_summary, remove_scratch_database
+
+def seed_booking_flights(session_factory, num_flights, seats):
+    with session_factory() as db:
+        flight_input = FlightInput(origin="LAX", destination="BOS", departure_date=date(2024, 3, 1))
+        flight_ids = generate_flights(flight_input, num_flights, db, seed=BENCHMARK_SEED)
+        db.query(Flight).filter(Flight.flight_id.in_(flight_ids)).update({Flight.open_seats_economy: seats})
+        db.commit()
+    return flight_ids
+
+def run_stress(session_factory, flight_ids, threads, seats_per_booking):
+    booked = Counter()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(threads)
+
+    def booker(worker_index):
+        # Spread workers across flights, but keep several workers on each one
+        flight_id = flight_ids[worker_index % len(flight_ids)]
+        local_latencies = []
+        local_booked = 0
+
+        start_barrier.wait()
+        with session_factory() as db:
+            while True:
+                started = time.perf_counter()
+                try:
+                    result = handle_flight_book(flight_id, "economy", seats_per_booking, db)
+                except Exception as e:
+                    db.rollback()
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+                finally:
+                    local_latencies.append(time.perf_counter() - started)
+
+                if not isinstance(result, dict):
+                    break
+                local_booked += seats_per_booking
+
+        with lock:
+            booked[flight_id] += local_booked
+            latencies.extend(local_latencies)
+
+    workers = [threading.Thread(target=booker, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    return booked, latencies, errors, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--flights", type=int, default=4)
+    parser.add_argument("--seats", type=int, default=500, help="Starting economy seats per flight")
+    parser.add_argument("--seats-per-booking", type=int, default=1)
+    args = parser.parse_args()
+
+    database_url, engine, session_factory = create_scratch_database()
+    try:
+        flight_ids = seed_booking_flights(session_factory, args.flights, args.seats)
+        booked, latencies, errors, elapsed = run_stress(session_factory, flight_ids, args.threads, args.seats_per_booking)
+
+        with session_factory() as db:
+            remaining = dict(db.query(Flight.flight_id, Flight.open_seats_economy).filter(Flight.flight_id.in_(flight_ids)))
+    finally:
+        engine.dispose()
+        remove_scratch_database(database_url)
+
+    oversold = {
+        flight_id: booked[flight_id] - args.seats
+        for flight_id in flight_ids
+        if booked[flight_id] + remaining[flight_id] != args.seats or remaining[flight_id] < 0
+    }
+    bookings = sum(booked.values()) // args.seats_per_booking
+
+    print(f"threads={args.threads} flights={args.flights} seats/flight={args.seats}")
+    print(f"bookings={bookings} in {elapsed:.2f}s ({bookings / elapsed:.0f} bookings/s)")
+    print(f"latency: {latency_summary(latencies)}")
+    print(f"errors={len(errors)} {Counter(errors).most_common(3) if errors else ''}")
+
+    if oversold or errors:
+        print(f"FAILED: oversold flights {oversold}")
+        return 1
+
+    print("OK: no flight was oversold")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date
+
+from sqlalchemy.orm import sessionmaker
+
+import models
+from models import create_db_engine, create_schema
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARK_ROUTES = [("LAX", "BOS"), ("SFO", "JFK"), ("ATL", "SEA"), ("DFW", "ORD")]
+BENCHMARK_START_DATE = date(2024, 3, 1)
+# Seed of every generated benchmark dataset, so runs compare like with like
+BENCHMARK_SEED = 2024
+
+def create_scratch_database(directory=None, filename=None):
+    """
+    Creates an empty flights database in a temporary file, configured like the application database.
+
+    Parameters:
+    - directory (optional): Directory to create the file in (default: the system temp directory).
+    - filename (optional): Exact file name to use instead of a random one, e.g. "flights.db" for a
+      directory that an API server is started in.
+
+    Returns:
+    A (database_url, engine, session_factory) tuple.
+    """
+    if filename:
+        path = os.path.join(directory or tempfile.gettempdir(), filename)
+    else:
+        handle, path = tempfile.mkstemp(prefix="flights-bench-", suffix=".db", dir=directory)
+        os.close(handle)
+
+    database_url = f"sqlite:///{path}"
+    engine = create_db_engine(database_url)
+    create_schema(engine)
+
+    return database_url, engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def remove_scratch_database(database_url):
+    path = database_url.removeprefix("sqlite:///")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+@contextmanager
+def app_database(engine, session_factory):
+    """
+    Points the application's engine and sessions at a scratch database while the block runs.
+
+    The API lifespan (schema creation, the hold reaper) and the streaming endpoints use
+    models.engine and models.SessionLocal directly, so overriding the get_db dependency alone would
+    still touch ./flights.db when the app runs under TestClient.
+    """
+    saved = models.engine, models.SessionLocal, models._schema_ready
+    models.engine, models.SessionLocal, models._schema_ready = engine, session_factory, False
+    try:
+        yield
+    finally:
+        models.engine, models.SessionLocal, models._schema_ready = saved
+
+def latency_summary(samples):
+    """
+    Summarizes latency samples given in seconds.
+
+    Returns:
+    A dictionary with the sample count and the mean, p50, p90, p99 and max latency in milliseconds.
+    """
+    if not samples:
+        return {"count": 0}
+
+    ordered = sorted(samples)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.50),
+        "p90_ms": percentile(0.90),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000
+    }
+
+def seed_flights(session_factory, num_flights, routes=BENCHMARK_ROUTES, days=30, chunk_size=5000, seed=BENCHMARK_SEED):
+    """
+    Fills a database with `num_flights` flights spread evenly over the given routes and `days` days
+    starting at BENCHMARK_START_DATE. The same arguments always produce the same flights.
+
+    The database is expected to be new, so its indexes are built after the flights are loaded.
+    """
+    from services.workload import WorkloadGenerator
+
+    generator = WorkloadGenerator(seed=seed, routes=routes, start_date=BENCHMARK_START_DATE, days=days, balanced=True, batch_size=chunk_size)
+    with session_factory() as db:
+        generator.write_database(db, num_flights, rebuild_indexes=True)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_api_server(workdir, port, workers=1, env=None):
+    """
+    Starts `uvicorn main:app` in `workdir`, so the app's relative ./flights.db resolves to the
+    database in that directory, and waits until it accepts connections.
+
+    Returns:
+    The uvicorn subprocess. Stop it with `stop_api_server`.
+    """
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+
+    process_env = dict(os.environ, PYTHONPATH=REPO_ROOT, **(env or {}))
+    process = subprocess.Popen(command, cwd=workdir, env=process_env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+
+    stop_api_server(process)
+    raise RuntimeError("API server did not start within 30 seconds")
+
+def stop_api_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
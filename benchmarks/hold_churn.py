@@ -0,0 +1,186 @@
+"""
+Seat hold churn benchmark.
+
+Many threads hold seats on the same few flights with short TTLs, each with its own session, and
+then confirm, release or abandon each hold. A reaper thread expires abandoned holds in batches the
+way the API's background task does. Reports hold, confirm and release throughput and latency, and
+how many holds the reaper expired.
+
+Afterwards every remaining hold is reaped and the inventory is checked. Per flight, the open
+seats plus the seats of confirmed holds must equal the starting inventory, and no open seat count
+may be negative.
+
+Each thread keeps a pooled connection, so threads plus the reaper should fit in the pool
+(DB_POOL_SIZE + DB_MAX_OVERFLOW, 15 by default), or the reaper waits for a connection.
+
+Usage (from the repository root):
+    python -m benchmarks.hold_churn --threads 12 --flights 4 --seats 200 --duration 10
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import func, select
+
+from models import Flight, FlightInput, SeatHold
+from services.flight_manager import generate_flights
+from services.seat_holds import handle_confirm_hold, handle_hold_seats, handle_release_hold, reap_expired_holds
+from benchmarks.common import BENCHMARK_SEED, create_scratch_database, latency_summary, remove_scratch_database
+
+def seed_hold_flights(session_factory, num_flights, seats):
+    with session_factory() as db:
+        flight_input = FlightInput(origin="LAX", destination="BOS", departure_date=date(2024, 3, 1))
+        flight_ids = generate_flights(flight_input, num_flights, db, seed=BENCHMARK_SEED)
+        db.query(Flight).filter(Flight.flight_id.in_(flight_ids)).update({Flight.open_seats_economy: seats})
+        db.commit()
+    return flight_ids
+
+def run_churn(session_factory, flight_ids, args):
+    latencies = {"hold": [], "confirm": [], "release": []}
+    outcomes = Counter()
+    errors = []
+    reaped = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker(worker_index):
+        rng = random.Random(worker_index)
+        local_latencies = {action: [] for action in latencies}
+        local_outcomes = Counter()
+
+        with session_factory() as db:
+            while not stop.is_set():
+                flight_id = rng.choice(flight_ids)
+                try:
+                    started = time.perf_counter()
+                    hold = handle_hold_seats(flight_id, "economy", rng.randint(1, 3), db, ttl_seconds=args.ttl)
+                    local_latencies["hold"].append(time.perf_counter() - started)
+
+                    if not isinstance(hold, dict):
+                        # Sold out or fully held, back off until holds are released or expire
+                        local_outcomes["hold refused"] += 1
+                        time.sleep(args.ttl / 10)
+                        continue
+
+                    local_outcomes["held"] += 1
+                    choice = rng.random()
+                    if choice < args.confirm_ratio:
+                        action, outcome, handler = "confirm", "confirmed", handle_confirm_hold
+                    elif choice < args.confirm_ratio + args.release_ratio:
+                        action, outcome, handler = "release", "released", handle_release_hold
+                    else:
+                        # Abandoned, left for the reaper
+                        local_outcomes["abandoned"] += 1
+                        continue
+
+                    started = time.perf_counter()
+                    result = handler(hold["hold_id"], db)
+                    local_latencies[action].append(time.perf_counter() - started)
+                    local_outcomes[outcome if isinstance(result, dict) else f"{action} refused"] += 1
+                except Exception as e:
+                    db.rollback()
+                    with lock:
+                        errors.append(repr(e))
+
+        with lock:
+            for action, samples in local_latencies.items():
+                latencies[action].extend(samples)
+            outcomes.update(local_outcomes)
+
+    def reaper():
+        while not stop.wait(args.reaper_interval):
+            try:
+                reaped.append(reap_expired_holds(session_factory, args.batch_size))
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.threads)]
+    threads.append(threading.Thread(target=reaper))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return latencies, outcomes, reaped, errors, elapsed
+
+def check_inventory(session_factory, flight_ids, seats):
+    """
+    Returns a list of problems found in the final inventory, empty when it is consistent.
+    """
+    with session_factory() as db:
+        open_seats = dict(db.execute(select(Flight.flight_id, Flight.open_seats_economy).where(Flight.flight_id.in_(flight_ids))).all())
+        confirmed = dict(db.execute(
+            select(SeatHold.flight_id, func.sum(SeatHold.num_seats))
+            .where(SeatHold.status == "confirmed", SeatHold.seat_type == "economy")
+            .group_by(SeatHold.flight_id)
+        ).all())
+        still_held = db.execute(select(func.count()).where(SeatHold.status == "held")).scalar()
+
+    problems = []
+    if still_held:
+        problems.append(f"{still_held} holds were never released")
+
+    for flight_id in flight_ids:
+        if open_seats[flight_id] < 0:
+            problems.append(f"flight {flight_id} has {open_seats[flight_id]} open seats")
+        if open_seats[flight_id] + confirmed.get(flight_id, 0) != seats:
+            problems.append(f"flight {flight_id}: {open_seats[flight_id]} open + {confirmed.get(flight_id, 0)} confirmed != {seats}")
+
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=12)
+    parser.add_argument("--flights", type=int, default=4, help="Flights the threads compete for")
+    parser.add_argument("--seats", type=int, default=200, help="Economy seats per flight")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of churn")
+    parser.add_argument("--ttl", type=float, default=0.5, help="Hold TTL in seconds")
+    parser.add_argument("--confirm-ratio", type=float, default=0.2, help="Share of holds confirmed")
+    parser.add_argument("--release-ratio", type=float, default=0.4, help="Share of holds released, the rest are abandoned")
+    parser.add_argument("--reaper-interval", type=float, default=0.25, help="Seconds between reaper runs")
+    parser.add_argument("--batch-size", type=int, default=500, help="Holds expired per reaper transaction")
+    args = parser.parse_args()
+
+    database_url, engine, session_factory = create_scratch_database()
+    try:
+        flight_ids = seed_hold_flights(session_factory, args.flights, args.seats)
+        latencies, outcomes, reaped, errors, elapsed = run_churn(session_factory, flight_ids, args)
+
+        # Let the remaining holds expire, then reap them so the inventory can be checked
+        time.sleep(args.ttl)
+        final_reap = reap_expired_holds(session_factory, args.batch_size)
+        problems = check_inventory(session_factory, flight_ids, args.seats)
+    finally:
+        engine.dispose()
+        remove_scratch_database(database_url)
+
+    print(f"{args.threads} threads on {args.flights} flights for {elapsed:.1f}s")
+    print(f"{'action':<8} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for action, samples in latencies.items():
+        summary = latency_summary(samples)
+        if summary["count"]:
+            print(f"{action:<8} {summary['count'] / elapsed:>8.0f} {summary['p50_ms']:>8.2f} {summary['p99_ms']:>8.2f}")
+
+    print(", ".join(f"{outcome}: {count}" for outcome, count in sorted(outcomes.items())))
+    print(f"reaper: {sum(reaped)} holds expired in {len(reaped)} runs, {final_reap} more after the run")
+
+    if errors:
+        print(f"{len(errors)} errors, first: {errors[0]}")
+    if problems or errors:
+        print("FAILED: " + "; ".join(problems[:5]))
+        sys.exit(1)
+
+    print("Inventory consistent: open + confirmed seats equal the starting seats on every flight")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Query plan regression check for /search-flights/, /fare-calendar/ and the seat hold reaper.
+
+Runs `EXPLAIN QUERY PLAN` for the count, page and cursor seek queries that `handle_flight_search` issues,
+for every filter combination `FlightSearchCriteria` allows, for the fare calendar query and for the
+reaper's expired hold lookup, and fails if any of them falls back to a full table scan.
+
+Usage (from the repository root):
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --database-url sqlite:///./flights.db
+"""
+import argparse
+import itertools
+import sys
+from datetime import date, datetime, time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from models import Flight, FlightSearchCriteria, create_schema
+from services.flight_manager import build_cursor_seek_filters, build_fare_calendar_query, build_flight_search_filters
+from services.seat_holds import build_expired_holds_query
+
+OPTIONAL_FILTERS = {
+    "arrival_date": {"arrival_date": "2024-03-05"},
+    "flight_number": {"flight_number": "AA342"},
+    "airline": {"airline": "DreamSky Airlines"},
+    "time_range": {"departure_time": time(6, 0), "arrival_time": time(18, 0)},
+}
+
+COST_FILTERS = [
+    {},
+    {"min_cost": 100},
+    {"max_cost": 400},
+    {"min_cost": 100, "max_cost": 400},
+]
+
+def iter_search_criteria():
+    """
+    Yields (label, FlightSearchCriteria) for every combination of optional filters.
+    """
+    seat_options = [None, "economy", "business", "first_class"]
+    names = list(OPTIONAL_FILTERS)
+
+    for size in range(len(names) + 1):
+        for combination in itertools.combinations(names, size):
+            for seat_type in seat_options:
+                for cost_filter in (COST_FILTERS if seat_type else [{}]):
+                    params = {"origin": "LAX", "destination": "BOS", "departure_date": date(2024, 3, 1)}
+                    for name in combination:
+                        params.update(OPTIONAL_FILTERS[name])
+                    if seat_type:
+                        params["seat_type"] = seat_type
+                        params.update(cost_filter)
+
+                    label = ", ".join(list(combination) + [seat_type or ""] + sorted(cost_filter)).strip(", ")
+                    yield label or "route/date only", FlightSearchCriteria(**params)
+
+def explain(connection, query):
+    """
+    Returns the detail lines of `EXPLAIN QUERY PLAN` for an ORM query or a select statement.
+    """
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(dialect=connection.dialect)
+
+    params = []
+    for name in compiled.positiontup:
+        value = compiled.params[name]
+        processor = compiled.binds[name].type.dialect_impl(connection.dialect).bind_processor(connection.dialect)
+        params.append(processor(value) if processor else value)
+
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", tuple(params)).fetchall()
+    return [row[3] for row in rows]
+
+def is_full_scan(plan, table="flights"):
+    return any(detail.startswith(f"SCAN {table}") and "INDEX" not in detail for detail in plan)
+
+def check_query_plans(engine, verbose=False):
+    """
+    Checks every search filter combination against the given engine.
+
+    Returns:
+    A list of (label, plan) tuples for the queries that scan the whole flights table.
+    """
+    failures = []
+
+    with Session(engine) as db:
+        connection = db.connection()
+        for label, criteria in iter_search_criteria():
+            query = db.query(Flight).filter(*build_flight_search_filters(criteria)).order_by(Flight.departure_time, Flight.flight_id)
+            seek_query = query.filter(*build_cursor_seek_filters(datetime(2024, 3, 2, 12, 0), 1000))
+
+            plan_queries = (
+                ("count", query.order_by(None).with_entities(Flight.flight_id)),
+                ("page", query.limit(10)),
+                ("cursor", seek_query.limit(11))
+            )
+            for kind, plan_query in plan_queries:
+                plan = explain(connection, plan_query)
+                if verbose:
+                    print(f"[{kind}] {label}: {' | '.join(plan)}")
+                if is_full_scan(plan):
+                    failures.append((f"[{kind}] {label}", plan))
+
+        calendar_query = build_fare_calendar_query("LAX", "BOS", datetime(2024, 3, 1), datetime.combine(date(2024, 3, 31), time.max))
+        plan = explain(connection, calendar_query)
+        if verbose:
+            print(f"[fare-calendar]: {' | '.join(plan)}")
+        if is_full_scan(plan):
+            failures.append(("[fare-calendar]", plan))
+
+        reaper_query = build_expired_holds_query(datetime(2024, 3, 1), 500)
+        plan = explain(connection, reaper_query)
+        if verbose:
+            print(f"[hold-reaper]: {' | '.join(plan)}")
+        if is_full_scan(plan, "seat_holds"):
+            failures.append(("[hold-reaper]", plan))
+
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite://", help="Database to check (default: empty in-memory schema)")
+    parser.add_argument("--verbose", action="store_true", help="Print the plan of every query")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    create_schema(engine)
+
+    failures = check_query_plans(engine, verbose=args.verbose)
+    for label, plan in failures:
+        print(f"FULL SCAN {label}: {' | '.join(plan)}")
+
+    if failures:
+        print(f"{len(failures)} queries do not use an index")
+        return 1
+
+    print("All search, fare calendar and hold reaper queries use an index")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
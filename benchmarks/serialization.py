@@ -0,0 +1,71 @@
+"""
+Microbenchmark of the search read path: ORM hydration and `FlightModel.from_orm` versus column rows
+serialized with orjson.
+
+For each page size it times fetching one page and serializing it to the response body:
+  - orm:  query Flight objects, convert with FlightModel.from_orm, jsonable_encoder + json.dumps
+          (what FastAPI's default JSONResponse does with the previous handler's result)
+  - lean: `query_flight_search` column rows as dicts, orjson.dumps (what ORJSONResponse does)
+
+Usage (from the repository root):
+    python -m benchmarks.serialization --iterations 200
+"""
+import argparse
+import json
+import time
+import warnings
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from models import Flight, FlightModel, FlightSearchCriteria
+from services.flight_manager import build_flight_search_filters, query_flight_search
+from benchmarks.common import BENCHMARK_START_DATE, create_scratch_database, remove_scratch_database, seed_flights
+
+PAGE_SIZES = (10, 100, 1000)
+
+def orm_page(criteria, db, page_size):
+    flights = db.query(Flight).filter(*build_flight_search_filters(criteria)).order_by(Flight.departure_time, Flight.flight_id).limit(page_size).all()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        flight_models = [FlightModel.from_orm(flight) for flight in flights]
+    body = {"query_results": len(flight_models), "flights": flight_models, "page": 1}
+    return json.dumps(jsonable_encoder(body)).encode()
+
+def lean_page(criteria, db, page_size):
+    body = query_flight_search(criteria, db, 1, page_size, include_total=False)
+    return orjson.dumps(body)
+
+def time_path(path, criteria, session_factory, page_size, iterations):
+    with session_factory() as db:
+        # Warm up the statement cache and the SQLite page cache
+        body = path(criteria, db, page_size)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            path(criteria, db, page_size)
+            # Drop identity map state between iterations, like a fresh request session
+            db.expunge_all()
+        elapsed = time.perf_counter() - started
+    return elapsed / iterations, len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    database_url, engine, session_factory = create_scratch_database()
+    try:
+        seed_flights(session_factory, 2000, routes=[("LAX", "BOS")], days=1)
+        criteria = FlightSearchCriteria(origin="LAX", destination="BOS", departure_date=BENCHMARK_START_DATE)
+
+        print(f"{'page size':>9} {'orm ms':>9} {'lean ms':>9} {'speedup':>8} {'bytes':>9}")
+        for page_size in PAGE_SIZES:
+            orm_seconds, orm_bytes = time_path(orm_page, criteria, session_factory, page_size, args.iterations)
+            lean_seconds, lean_bytes = time_path(lean_page, criteria, session_factory, page_size, args.iterations)
+            print(f"{page_size:>9} {orm_seconds * 1000:>9.3f} {lean_seconds * 1000:>9.3f} {orm_seconds / lean_seconds:>7.1f}x {lean_bytes:>9}")
+    finally:
+        engine.dispose()
+        remove_scratch_database(database_url)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cold start and per-interaction overhead.
+
+Import mode (the default) imports each module in fresh interpreters under `python -X importtime`
+and reports the median total import time, plus the slowest imports below each module. Every
+module is imported on its own, so the numbers are what a process pays on a cold start:
+- `main` for an API worker
+- `services.flight_agent` for the chat agent and its tool functions
+- `services.flight_manager` for scripts that call the handlers directly
+
+Rerun mode (--rerun) drives `sample.py` with Streamlit's AppTest and times each rerun as the
+conversation grows. Rerun time should stay flat when the model and chat session are cached; a
+rerun that replays the history grows with every turn. It needs streamlit installed. By default
+the chat app runs on the offline stub model; pass --model gemini-pro to measure against Vertex AI,
+which needs the vertexai package and credentials.
+
+Usage (from the repository root):
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --modules main --top 15
+    python -m benchmarks.startup --rerun --turns 10
+    python -m benchmarks.startup --rerun --model gemini-pro
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import REPO_ROOT
+
+DEFAULT_MODULES = ["main", "services.flight_agent", "services.flight_manager", "models"]
+
+def import_times(module: str):
+    """
+    Imports `module` in a fresh interpreter under -X importtime.
+
+    Returns:
+    A dictionary of imported module name to cumulative import time in milliseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+
+    # Lines look like "import time:       515 |     233356 |   services.flight_client"
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1000
+
+    return times
+
+def measure_imports(modules, runs: int, top: int):
+    print(f"{'module':<28} {'median ms':>10} {'min ms':>8}")
+    for module in modules:
+        runs_times = [import_times(module) for _ in range(runs)]
+        totals = [times[module] for times in runs_times]
+        print(f"{module:<28} {statistics.median(totals):>10.1f} {min(totals):>8.1f}")
+
+        if top:
+            # Top level packages only, nested imports are already part of their parent's time
+            last_run = runs_times[-1]
+            packages = {name: ms for name, ms in last_run.items() if "." not in name and name != module}
+            for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+                print(f"    {name:<24} {ms:>10.1f}")
+
+def measure_reruns(script: str, turns: int, model: str):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("Rerun mode needs streamlit, install it with `pip install streamlit`")
+        return 1
+
+    # Read by services.flight_agent when the app first imports it
+    os.environ["FLIGHT_AGENT_MODEL"] = model
+
+    app = AppTest.from_file(os.path.join(REPO_ROOT, script), default_timeout=120)
+
+    started = time.perf_counter()
+    app.run()
+    print(f"first run (cold start): {(time.perf_counter() - started) * 1000:.0f} ms")
+    if app.exception:
+        print(app.exception[0].message)
+        return 1
+
+    print(f"{'turn':>4} {'history':>8} {'rerun ms':>9}")
+    for turn in range(1, turns + 1):
+        app.chat_input[0].set_value("Say hello in one word")
+        started = time.perf_counter()
+        app.run()
+        elapsed = (time.perf_counter() - started) * 1000
+        if app.exception:
+            print(app.exception[0].message)
+            return 1
+
+        print(f"{turn:>4} {len(app.session_state['messages']):>8} {elapsed:>9.0f}")
+
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Modules to time the import of")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=8, help="Slowest packages to list per module (0 to hide)")
+    parser.add_argument("--rerun", action="store_true", help="Time Streamlit reruns of the chat app instead")
+    parser.add_argument("--script", default="sample.py", help="Streamlit script for --rerun")
+    parser.add_argument("--turns", type=int, default=5, help="Chat turns for --rerun")
+    parser.add_argument("--model", default="stub", help="Chat model for --rerun, \"stub\" or a Vertex AI model name")
+    args = parser.parse_args()
+
+    if args.rerun:
+        sys.exit(measure_reruns(args.script, args.turns, args.model))
+
+    measure_imports(args.modules, args.runs, args.top)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Benchmark suite for flight search, booking and generation.
+
+For every scale it seeds a scratch database with that many flights, then drives
+`handle_flight_search`, `handle_flight_book` and `generate_flights` both directly and through the
+FastAPI app (in process, via TestClient), and records throughput and latency percentiles. Results
+are written as JSON and can be compared against a saved baseline run.
+
+Usage (from the repository root):
+    python -m benchmarks.suite --scales 10000 100000 --output results.json
+    python -m benchmarks.suite --scales 10000 --output new.json --baseline results.json
+
+The search cache is disabled unless --with-cache is passed, so search numbers measure the database path.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from models import FlightInput, FlightSearchCriteria
+from services.flight_manager import generate_flights, handle_flight_book, handle_flight_search
+from services.search_cache import search_cache
+from benchmarks.common import (
+    BENCHMARK_ROUTES,
+    BENCHMARK_SEED,
+    BENCHMARK_START_DATE,
+    app_database,
+    create_scratch_database,
+    latency_summary,
+    remove_scratch_database,
+    seed_flights
+)
+
+DEFAULT_SCALES = (10000, 100000, 1000000)
+SEED_DAYS = 30
+GENERATE_BATCH = 100
+
+# Metrics compared against the baseline, and whether higher values are better
+COMPARED_METRICS = {"throughput": True, "p50_ms": False, "p99_ms": False}
+
+def random_search_params():
+    origin, destination = random.choice(BENCHMARK_ROUTES)
+    departure_date = BENCHMARK_START_DATE + timedelta(days=random.randrange(SEED_DAYS))
+    return {
+        "origin": origin,
+        "destination": destination,
+        "departure_date": departure_date.isoformat(),
+        "arrival_date": departure_date.isoformat()
+    }
+
+def measure(operation, iterations, items_per_operation=1):
+    """
+    Runs `operation` `iterations` times and summarizes its latency and throughput (items per second).
+    """
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        operation_started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - operation_started)
+    elapsed = time.perf_counter() - started
+
+    summary = latency_summary(latencies)
+    summary["throughput"] = iterations * items_per_operation / elapsed
+    return summary
+
+def direct_scenarios(db, num_flights):
+    def search():
+        handle_flight_search(FlightSearchCriteria(**random_search_params()), db, random.randint(1, 3), 10)
+
+    def search_cursor():
+        handle_flight_search(FlightSearchCriteria(**random_search_params()), db, page_size=10, pagination="cursor")
+
+    def book():
+        handle_flight_book(random.randint(1, num_flights), random.choice(["economy", "business", "first_class"]), 1, db)
+
+    def generate():
+        origin, destination = random.choice(BENCHMARK_ROUTES)
+        generate_flights(FlightInput(origin=origin, destination=destination, departure_date=BENCHMARK_START_DATE), GENERATE_BATCH, db)
+
+    return {"search": (search, 1), "search_cursor": (search_cursor, 1), "book": (book, 1), "generate": (generate, GENERATE_BATCH)}
+
+def api_scenarios(client, num_flights):
+    def search():
+        response = client.get("/search-flights/", params=dict(random_search_params(), page=random.randint(1, 3), page_size=10))
+        response.raise_for_status()
+
+    def search_cursor():
+        response = client.get("/search-flights/", params=dict(random_search_params(), page_size=10, pagination="cursor"))
+        response.raise_for_status()
+
+    def book():
+        response = client.post("/book_flight", params={"flight_id": random.randint(1, num_flights), "seat_type": "economy"})
+        response.raise_for_status()
+
+    def generate():
+        origin, destination = random.choice(BENCHMARK_ROUTES)
+        body = {"origin": origin, "destination": destination, "departure_date": BENCHMARK_START_DATE.isoformat()}
+        response = client.post("/generate-flight/", params={"num_flights": GENERATE_BATCH}, json=body)
+        response.raise_for_status()
+
+    return {"search": (search, 1), "search_cursor": (search_cursor, 1), "book": (book, 1), "generate": (generate, GENERATE_BATCH)}
+
+def run_scale(num_flights, iterations):
+    """
+    Seeds a scratch database with `num_flights` flights and runs every scenario against it.
+
+    Returns:
+    A dictionary of scenario name ("direct.search", "api.book", ...) to its measurements.
+    """
+    database_url, engine, session_factory = create_scratch_database()
+    results = {}
+    # Same dataset and same request sequence on every run
+    random.seed(BENCHMARK_SEED)
+
+    try:
+        seed_started = time.perf_counter()
+        seed_flights(session_factory, num_flights, days=SEED_DAYS)
+        results["seed"] = {"seconds": time.perf_counter() - seed_started, "throughput": num_flights / (time.perf_counter() - seed_started)}
+
+        with session_factory() as db:
+            for name, (operation, items) in direct_scenarios(db, num_flights).items():
+                results[f"direct.{name}"] = measure(operation, iterations if name != "generate" else max(1, iterations // 10), items)
+
+        from main import app
+        with app_database(engine, session_factory), TestClient(app) as client:
+            for name, (operation, items) in api_scenarios(client, num_flights).items():
+                results[f"api.{name}"] = measure(operation, iterations if name != "generate" else max(1, iterations // 10), items)
+    finally:
+        engine.dispose()
+        remove_scratch_database(database_url)
+
+    return results
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Compares two result documents scenario by scenario.
+
+    Returns:
+    A list of human readable regression descriptions for metrics that got worse by more than
+    `threshold` (a fraction, e.g. 0.1 for 10%).
+    """
+    regressions = []
+
+    for scale, scenarios in results["results"].items():
+        for scenario, metrics in scenarios.items():
+            baseline_metrics = baseline.get("results", {}).get(scale, {}).get(scenario)
+            if not baseline_metrics:
+                continue
+
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                if metric not in metrics or not baseline_metrics.get(metric):
+                    continue
+
+                change = (metrics[metric] - baseline_metrics[metric]) / baseline_metrics[metric]
+                if (-change if higher_is_better else change) > threshold:
+                    regressions.append(f"{scale} {scenario} {metric}: {baseline_metrics[metric]:.3f} -> {metrics[metric]:.3f} ({change:+.1%})")
+
+    return regressions
+
+def print_results(results):
+    print(f"{'scale':>9} {'scenario':<22} {'throughput/s':>13} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+    for scale, scenarios in results["results"].items():
+        for scenario, metrics in scenarios.items():
+            if scenario == "seed":
+                print(f"{scale:>9} {scenario:<22} {metrics['throughput']:>13.0f}   ({metrics['seconds']:.1f}s)")
+                continue
+            print(f"{scale:>9} {scenario:<22} {metrics['throughput']:>13.1f} {metrics['p50_ms']:>9.2f} {metrics['p90_ms']:>9.2f} {metrics['p99_ms']:>9.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES), help="Numbers of seeded flights to benchmark at")
+    parser.add_argument("--iterations", type=int, default=300, help="Operations per scenario (generation runs a tenth as many batches)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against the JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative change counted as a regression (default 0.15)")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the search cache enabled")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed for the request mix")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if not args.with_cache:
+        search_cache.max_entries = 0
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "search_cache": args.with_cache
+        },
+        "results": {}
+    }
+
+    for scale in args.scales:
+        print(f"Running scale {scale}...", file=sys.stderr)
+        results["results"][str(scale)] = run_scale(scale, args.iterations)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(results, json.load(baseline_file), args.threshold)
+
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
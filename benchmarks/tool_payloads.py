@@ -0,0 +1,58 @@
+"""
+Tool response sizes.
+
+Seeds a scratch database and compares the JSON size of the responses the chat agent can send back
+to the model: full /search-flights/ pages against /search-flights/compact tables, and full
+/search-itineraries/ results against compact ones. Sizes are compact JSON bytes as sent in a
+function response, with a rough token estimate of 4 bytes per token.
+
+Usage (from the repository root):
+    python -m benchmarks.tool_payloads --flights 20000 --limit 10
+"""
+import argparse
+import statistics
+
+from benchmarks.common import BENCHMARK_ROUTES, BENCHMARK_START_DATE, create_scratch_database, remove_scratch_database, seed_flights
+from services.flight_agent import FLIGHT_AGENT_MAX_TOOL_BYTES, FLIGHT_AGENT_MAX_TURN_BYTES, payload_bytes
+from services.flight_client import InProcessFlightSearchClient
+from schemas import CompactSearchCriteria, FlightSearchCriteria, ItinerarySearchCriteria
+
+BYTES_PER_TOKEN = 4
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, default=20000, help="Flights to seed into the scratch database")
+    parser.add_argument("--limit", type=int, default=10, help="Flights or itineraries per response")
+    args = parser.parse_args()
+
+    database_url, engine, session_factory = create_scratch_database()
+    seed_flights(session_factory, args.flights)
+    client = InProcessFlightSearchClient(session_factory)
+
+    searches = {
+        "full search": lambda origin, destination: client.search_flights(
+            FlightSearchCriteria(origin=origin, destination=destination, departure_date=BENCHMARK_START_DATE), page_size=args.limit),
+        "compact, earliest": lambda origin, destination: client.search_flights_compact(
+            CompactSearchCriteria(origin=origin, destination=destination, departure_date=BENCHMARK_START_DATE, limit=args.limit)),
+        "compact, cheapest business": lambda origin, destination: client.search_flights_compact(
+            CompactSearchCriteria(origin=origin, destination=destination, departure_date=BENCHMARK_START_DATE, seat_type="business", rank_by="cheapest", limit=args.limit)),
+        "full itineraries": lambda origin, destination: client.search_itineraries(
+            ItinerarySearchCriteria(origin=origin, destination=destination, departure_date=BENCHMARK_START_DATE, max_stops=2, limit=args.limit)),
+        "compact itineraries": lambda origin, destination: client.search_itineraries(
+            ItinerarySearchCriteria(origin=origin, destination=destination, departure_date=BENCHMARK_START_DATE, max_stops=2, limit=args.limit, compact=True)),
+    }
+
+    try:
+        print(f"{'response':<28} {'median bytes':>12} {'max bytes':>10} {'~tokens':>8}")
+        for label, search in searches.items():
+            sizes = [payload_bytes(search(origin, destination)) for origin, destination in BENCHMARK_ROUTES]
+            median = statistics.median(sizes)
+            print(f"{label:<28} {median:>12.0f} {max(sizes):>10} {median / BYTES_PER_TOKEN:>8.0f}")
+
+        print(f"\nThe agent cuts tool responses to FLIGHT_AGENT_MAX_TOOL_BYTES={FLIGHT_AGENT_MAX_TOOL_BYTES} bytes each, and to FLIGHT_AGENT_MAX_TURN_BYTES={FLIGHT_AGENT_MAX_TURN_BYTES} bytes per turn.")
+    finally:
+        engine.dispose()
+        remove_scratch_database(database_url)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Synthetic workload generation.
+
+Generates a seeded multi-route, multi-day flight schedule with `services.workload.WorkloadGenerator`
+and writes it to a database, a CSV file or a Parquet file, reporting the sampling and write
+throughput. A digest of the generated columns is printed, so two runs can be checked to have
+produced identical data.
+
+Usage (from the repository root):
+    python -m benchmarks.workload --flights 1000000 --seed 2024
+    python -m benchmarks.workload --flights 1000000 --output flights.parquet
+    python -m benchmarks.workload --flights 100000 --output sqlite:///./flights.db
+
+Without --output the flights go to a scratch database that is removed afterwards. Database loads
+drop and rebuild the flights indexes unless --keep-indexes is given, so only load into a database
+that is not being served. Parquet output requires pyarrow.
+"""
+import argparse
+import hashlib
+import time
+from datetime import date
+
+from sqlalchemy.orm import sessionmaker
+
+from models import create_db_engine, create_schema
+from services.workload import DEFAULT_AIRPORTS, WORKLOAD_BATCH_SIZE, WorkloadGenerator
+from benchmarks.common import BENCHMARK_SEED, create_scratch_database, remove_scratch_database
+
+def workload_digest(generator, num_flights):
+    """
+    Samples the workload without writing it and returns (seconds, sha256 of every column).
+    """
+    digest = hashlib.sha256()
+    started = time.perf_counter()
+    for columns in generator.iter_batches(num_flights):
+        for column in columns.values():
+            digest.update(column.tobytes())
+    return time.perf_counter() - started, digest.hexdigest()
+
+def write_workload(generator, num_flights, output, rebuild_indexes):
+    if output is None:
+        database_url, engine, session_factory = create_scratch_database()
+        try:
+            with session_factory() as db:
+                return generator.write_database(db, num_flights, rebuild_indexes)
+        finally:
+            engine.dispose()
+            remove_scratch_database(database_url)
+
+    if output.endswith(".csv"):
+        return generator.write_csv(output, num_flights)
+    if output.endswith(".parquet"):
+        return generator.write_parquet(output, num_flights)
+
+    engine = create_db_engine(output)
+    create_schema(engine)
+    try:
+        with sessionmaker(autocommit=False, autoflush=False, bind=engine)() as db:
+            return generator.write_database(db, num_flights, rebuild_indexes)
+    finally:
+        engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=BENCHMARK_SEED)
+    parser.add_argument("--airports", nargs="+", default=list(DEFAULT_AIRPORTS), help="Airport codes, busiest first")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=WORKLOAD_BATCH_SIZE)
+    parser.add_argument("--output", help="A .csv or .parquet path, or a database URL (default: a scratch database)")
+    parser.add_argument("--keep-indexes", action="store_true", help="Update the indexes row by row instead of rebuilding them after the load")
+    args = parser.parse_args()
+
+    generator = WorkloadGenerator(seed=args.seed, airports=args.airports, start_date=args.start_date, days=args.days, batch_size=args.batch_size)
+
+    sample_seconds, digest = workload_digest(generator, args.flights)
+    print(f"{args.flights} flights over {len(generator.routes)} routes and {args.days} days, seed {generator.seed}")
+    print(f"sampled in {sample_seconds:.2f}s ({args.flights / sample_seconds:,.0f} flights/s), digest {digest[:16]}")
+
+    started = time.perf_counter()
+    written = write_workload(generator, args.flights, args.output, not args.keep_indexes)
+    elapsed = time.perf_counter() - started
+    print(f"wrote {written} flights to {args.output or 'a scratch database'} in {elapsed:.2f}s ({written / elapsed:,.0f} flights/s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,52 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+import asyncio
+import cProfile
+from contextlib import asynccontextmanager
 import logging
+import time
 
-from services.flight_manager import generate_flights, handle_flight_search, handle_flight_book
+from services.flight_manager import (
+    generate_flights,
+    MAX_SEARCH_PAGE_SIZE,
+    handle_flight_search,
+    handle_compact_flight_search,
+    handle_flight_book,
+    handle_batch_booking,
+    handle_itinerary_search,
+    handle_cheapest_fares,
+    handle_daily_fares,
+    handle_fare_calendar,
+    build_flight_search_filters,
+    iter_flight_row_chunks,
+    stream_flights_csv,
+    stream_flights_json_array,
+    stream_flights_ndjson
+)
+from services.async_flight_manager import handle_flight_search_async, handle_flight_book_async
+from services.metrics import (
+    REQUEST_DURATION,
+    REQUEST_ROWS_RETURNED,
+    REQUEST_SQL_DURATION,
+    REQUEST_SQL_STATEMENTS,
+    RequestStats,
+    current_request_stats,
+    instrument_sql,
+    profile_report,
+    register_collector,
+    render_prometheus
+)
+from services.search_cache import search_cache
+from services.seat_holds import (
+    HOLD_REAPER_INTERVAL_SECONDS,
+    handle_confirm_hold,
+    handle_hold_seats,
+    handle_release_hold,
+    run_hold_reaper
+)
 import models
 
 # Configure logging
@@ -11,11 +54,76 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 logger = logging.getLogger(__name__)
     
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema checks run once per worker on startup rather than on import, so importing the app
+    # (e.g. in a gunicorn master or a test) does not touch the database
+    models.init_db()
+
+    # Gives the seats of expired holds back to their flights
+    reaper = None
+    if HOLD_REAPER_INTERVAL_SECONDS > 0:
+        reaper = asyncio.create_task(run_hold_reaper(models.SessionLocal, HOLD_REAPER_INTERVAL_SECONDS))
+
+    yield
+
+    if reaper is not None:
+        reaper.cancel()
+        try:
+            await reaper
+        except asyncio.CancelledError:
+            pass
+
+app = FastAPI(lifespan=lifespan)
+
+# Time every SQL statement and expose the search cache counters on /metrics
+instrument_sql()
+register_collector(search_cache.prometheus_samples)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Records latency, SQL time, SQL statement count and returned rows for every request.
+
+    Requests with `?profile=1` or an `X-Profile: 1` header are also run under cProfile, and the
+    pstats report is returned instead of the normal response.
+    """
+    profile = request.query_params.get("profile") == "1" or request.headers.get("x-profile") == "1"
+    stats = RequestStats(cProfile.Profile() if profile else None)
+
+    token = current_request_stats.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_stats.reset(token)
+    elapsed = time.perf_counter() - started
+
+    # Label by route template rather than raw URL, so the number of series stays bounded
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+
+    REQUEST_DURATION.observe(elapsed, request.method, path, response.status_code)
+    REQUEST_SQL_DURATION.observe(stats.sql_time, request.method, path)
+    REQUEST_SQL_STATEMENTS.observe(stats.sql_statements, request.method, path)
+    REQUEST_ROWS_RETURNED.observe(stats.rows_returned, request.method, path)
+
+    if profile:
+        summary = f"{request.method} {path} -> {response.status_code} in {elapsed * 1000:.2f} ms, {stats.sql_statements} SQL statement(s) taking {stats.sql_time * 1000:.2f} ms, {stats.rows_returned} row(s) returned\n\n"
+        return PlainTextResponse(summary + profile_report(stats.profiler))
+
+    response.headers["Server-Timing"] = f"db;dur={stats.sql_time * 1000:.2f}, total;dur={elapsed * 1000:.2f}"
+    response.headers["X-SQL-Statements"] = str(stats.sql_statements)
+    return response
 
 @app.post("/generate-flight/")
-def generate_flight(flight_input: models.FlightInput, num_flights: int, db: Session = Depends(models.get_db)):
-    return generate_flights(flight_input, num_flights, db)
+def generate_flight(flight_input: models.FlightInput, num_flights: int, chunk_size: int = 1000, vectorized: bool = False, seed: Optional[int] = None, db: Session = Depends(models.get_db)):
+    try:
+        flight_ids = generate_flights(flight_input, num_flights, db, chunk_size, vectorized, seed)
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"num_flights": len(flight_ids), "flights": flight_ids}
 
 @app.post("/book_flight")
 def book_flight_endpoint(flight_id: int, seat_type: str, num_seats: int = 1, db: Session = Depends(models.get_db)):
@@ -25,11 +133,114 @@ def book_flight_endpoint(flight_id: int, seat_type: str, num_seats: int = 1, db:
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/book_flights")
+def book_flights_endpoint(booking: models.BatchBookingRequest, db: Session = Depends(models.get_db)):
+    # All legs are booked in one transaction, or none are
+    try:
+        result = handle_batch_booking(booking.legs, db)
+        return {"message": result}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/holds")
+def hold_seats_endpoint(flight_id: int, seat_type: str, num_seats: int = 1, ttl_seconds: Optional[float] = None, db: Session = Depends(models.get_db)):
+    # Reserves the seats until confirmed, released or expired
+    try:
+        result = handle_hold_seats(flight_id, seat_type, num_seats, db, ttl_seconds)
+        return {"message": result}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/holds/{hold_id}/confirm")
+def confirm_hold_endpoint(hold_id: int, db: Session = Depends(models.get_db)):
+    try:
+        result = handle_confirm_hold(hold_id, db)
+        return {"message": result}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/holds/{hold_id}")
+def release_hold_endpoint(hold_id: int, db: Session = Depends(models.get_db)):
+    try:
+        result = handle_release_hold(hold_id, db)
+        return {"message": result}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/flights/", response_model=List[models.FlightModel])
-def read_all_flights(db: Session = Depends(models.get_db)):
-    flights = db.query(models.Flight).all()
-    return flights
+def read_all_flights():
+    # Streamed as a JSON array so memory stays flat and the first bytes go out right away
+    row_chunks = iter_flight_row_chunks(models.SessionLocal)
+    return StreamingResponse(stream_flights_json_array(row_chunks), media_type="application/json")
+
+@app.get("/flights/export")
+def export_flights(criteria: models.FlightSearchCriteria = Depends(), format: Literal["ndjson", "csv"] = "ndjson", chunk_size: int = 1000):
+    try:
+        filters = build_flight_search_filters(criteria)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Arrival date present but invalid as data type")
+
+    row_chunks = iter_flight_row_chunks(models.SessionLocal, filters, chunk_size)
+
+    if format == "csv":
+        return StreamingResponse(stream_flights_csv(row_chunks), media_type="text/csv", headers={"Content-Disposition": "attachment; filename=flights.csv"})
+
+    return StreamingResponse(stream_flights_ndjson(row_chunks), media_type="application/x-ndjson")
+
+@app.get("/search-flights/", response_class=ORJSONResponse)
+def search_flights_endpoint(criteria: models.FlightSearchCriteria = Depends(), page: int = Query(1, ge=1), page_size: int = Query(10, ge=1, le=MAX_SEARCH_PAGE_SIZE), cursor: Optional[str] = None, pagination: Literal["offset", "cursor"] = "offset", include_total: Optional[bool] = None, db: Session = Depends(models.get_db)):
+    # Search results are plain dicts of JSON native types, so orjson can serialize them directly
+    # without FastAPI walking them through jsonable_encoder first
+    return ORJSONResponse(handle_flight_search(criteria, db, page, page_size, cursor, pagination, include_total))
+
+@app.get("/search-flights/compact", response_class=ORJSONResponse)
+def search_flights_compact_endpoint(criteria: models.CompactSearchCriteria = Depends(), db: Session = Depends(models.get_db)):
+    # Ranked table of the fields a chat model needs, for tool responses
+    return ORJSONResponse(handle_compact_flight_search(criteria, db))
+
+@app.get("/search-itineraries/", response_class=ORJSONResponse)
+def search_itineraries_endpoint(criteria: models.ItinerarySearchCriteria = Depends(), db: Session = Depends(models.get_db)):
+    # Direct, one stop and two stop trips, found by walking the in-memory route graph
+    return ORJSONResponse(handle_itinerary_search(criteria, db))
+
+@app.get("/fare-calendar/", response_class=ORJSONResponse)
+def fare_calendar_endpoint(criteria: models.FareCalendarCriteria = Depends(), db: Session = Depends(models.get_db)):
+    # Per-day flight counts, fares and open seats for a route, from one GROUP BY query
+    return ORJSONResponse(handle_fare_calendar(criteria, db))
+
+@app.get("/fares/cheapest", response_class=ORJSONResponse)
+def cheapest_fares_endpoint(criteria: models.FareSearchCriteria = Depends(), db: Session = Depends(models.get_db)):
+    try:
+        return ORJSONResponse(handle_cheapest_fares(criteria, db))
+    except RuntimeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/fares/daily", response_class=ORJSONResponse)
+def daily_fares_endpoint(criteria: models.FareSearchCriteria = Depends(), db: Session = Depends(models.get_db)):
+    try:
+        return ORJSONResponse(handle_daily_fares(criteria, db))
+    except RuntimeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/search-cache/stats")
+def search_cache_stats_endpoint():
+    return search_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# Async variants of the search and booking endpoints. They run on the event loop with an AsyncSession
+# instead of holding a threadpool worker for the whole request.
+@app.post("/async/book_flight")
+async def book_flight_async_endpoint(flight_id: int, seat_type: str, num_seats: int = 1, db: AsyncSession = Depends(models.get_async_db)):
+    try:
+        result = await handle_flight_book_async(flight_id, seat_type, num_seats, db)
+        return {"message": result}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/search-flights/")
-def search_flights_endpoint(criteria: models.FlightSearchCriteria = Depends(), page: Optional[int] = 1, page_size: Optional[int] = 10, db: Session = Depends(models.get_db)):
-    return handle_flight_search(criteria, db, page, page_size)
+@app.get("/async/search-flights/", response_class=ORJSONResponse)
+async def search_flights_async_endpoint(criteria: models.FlightSearchCriteria = Depends(), page: int = Query(1, ge=1), page_size: int = Query(10, ge=1, le=MAX_SEARCH_PAGE_SIZE), cursor: Optional[str] = None, pagination: Literal["offset", "cursor"] = "offset", include_total: Optional[bool] = None, db: AsyncSession = Depends(models.get_async_db)):
+    return ORJSONResponse(await handle_flight_search_async(criteria, db, page, page_size, cursor, pagination, include_total))
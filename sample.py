@@ -1,92 +1,20 @@
-import vertexai
 import streamlit as st
-from vertexai.preview import generative_models
-from vertexai.preview.generative_models import GenerativeModel, Tool, Part, Content, ChatSession
-from services.flight_manager import search_flights
-
-project = "sample-gemini"
-vertexai.init(project = project)
-
-# Define Tool
-get_search_flights = generative_models.FunctionDeclaration(
-    name="get_search_flights",
-    description="Tool for searching a flight with origin, destination, and departure date",
-    parameters={
-        "type": "object",
-        "properties": {
-            "origin": {
-                "type": "string",
-                "description": "The airport of departure for the flight given in airport code such as LAX, SFO, BOS, etc."
-            },
-            "destination": {
-                "type": "string",
-                "description": "The airport of destination for the flight given in airport code such as LAX, SFO, BOS, etc."
-            },
-            "departure_date": {
-                "type": "string",
-                "format": "date",
-                "description": "The date of departure for the flight in YYYY-MM-DD format"
-            },
-        },
-        "required": [
-            "origin",
-            "destination",
-            "departure_date"
-        ]
-    },
-)
-
-# Define tool and model with tools
-search_tool = generative_models.Tool(
-    function_declarations=[get_search_flights],
-)
-
-config = generative_models.GenerationConfig(temperature=0.4)
-# Load model with config
-model = GenerativeModel(
-    "gemini-pro",
-    tools = [search_tool],
-    generation_config = config
-)
-
-# helper function to unpack responses
-def handle_response(response):
-    
-    # Check for function call with intermediate step, always return response
-    if response.candidates[0].content.parts[0].function_call.args:
-        # Function call exists, unpack and load into a function
-        response_args = response.candidates[0].content.parts[0].function_call.args
-        
-        function_params = {}
-        for key in response_args:
-            value = response_args[key]
-            function_params[key] = value
-        
-        results = search_flights(**function_params)
-        
-        if results:
-            intermediate_response = chat.send_message(
-                Part.from_function_response(
-                    name="get_search_flights",
-                    response = results
-                )
-            )
-            
-            return intermediate_response.candidates[0].content.parts[0].text
-        else:
-            return "Search Failed"
-    else:
-        # Return just text
-        return response.candidates[0].content.parts[0].text
-
-# helper function to display and send streamlit messages
-def llm_function(chat: ChatSession, query):
-    response = chat.send_message(query)
-    output = handle_response(response)
-    
+# The agent only needs the API client, not the FastAPI app or the database layer
+from services.flight_agent import FLIGHT_AGENT_MODEL, create_agent, create_model
+
+# Streamlit runs this script again on every interaction, so the model is built once per process
+# and shared by every rerun and session instead of being re-created each time.
+# Set FLIGHT_AGENT_MODEL=stub to run without Vertex AI.
+@st.cache_resource
+def load_model():
+    return create_model(FLIGHT_AGENT_MODEL)
+
+# helper function to stream, display and store streamlit messages
+def llm_function(agent, query):
+    # Text is rendered as it streams in; function calls in between run in parallel
     with st.chat_message("model"):
-        st.markdown(output)
-    
+        output = st.write_stream(agent.send(query))
+
     st.session_state.messages.append(
         {
             "role": "user",
@@ -102,31 +30,29 @@ def llm_function(chat: ChatSession, query):
 
 st.title("Gemini Flights")
 
-chat = model.start_chat()
+model = load_model()
 
-# Initialize chat history
+# Initialize chat history. The agent and its chat session live in the session state, so they keep
+# their history across reruns and a new message costs one request, not a replay of the conversation.
+if "agent" not in st.session_state:
+    st.session_state.agent = create_agent(model)
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-# Display and load to chat history
+agent = st.session_state.agent
+
+# Display chat history
 for index, message in enumerate(st.session_state.messages):
-    content = Content(
-            role = message["role"],
-            parts = [ Part.from_text(message["content"]) ]
-        )
-    
     if index != 0:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
-    chat.history.append(content)
-
 # For Initial message startup
 if len(st.session_state.messages) == 0:
     # Invoke initial message
     initial_prompt = "Introduce yourself as a flights management assistant, ReX, powered by Google Gemini and designed to search/book flights. You use emojis to be interactive. For reference, the year for dates is 2024"
 
-    llm_function(chat, initial_prompt)
+    llm_function(agent, initial_prompt)
 
 # For capture user input
 query = st.chat_input("Gemini Flights")
@@ -134,4 +60,4 @@ query = st.chat_input("Gemini Flights")
 if query:
     with st.chat_message("user"):
         st.markdown(query)
-    llm_function(chat, query)
+    llm_function(agent, query)
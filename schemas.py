@@ -0,0 +1,84 @@
+from pydantic import BaseModel, Field
+from datetime import date, datetime, time
+from typing import List, Literal, Optional
+
+# Pydantic Models for inputs & Body Validation
+class FlightModel(BaseModel):
+    flight_id: int
+    flight_number: str
+    airline: str
+    origin: str
+    destination: str
+    
+    departure_date: date
+    arrival_date: date
+    departure_time: datetime
+    arrival_time: datetime
+    
+    open_seats_economy: int
+    open_seats_business: int
+    open_seats_first_class: int
+    economy_seat_cost: int
+    business_seat_cost: int
+    first_class_cost: int
+
+    class Config:
+        from_attributes = True
+
+class FlightInput(BaseModel):
+    origin: str
+    destination: str
+    departure_date: date
+
+class FlightSearchCriteria(BaseModel):
+    origin: str
+    destination: str
+    departure_date: date
+    arrival_date: Optional[str] = None
+    flight_number: Optional[str] = None
+    airline: Optional[str] = None
+    departure_time: Optional[time] = None
+    arrival_time: Optional[time] = None
+    seat_type: Optional[str] = None  # 'economy', 'business', 'first_class'
+    min_cost: Optional[int] = None
+    max_cost: Optional[int] = None
+
+class CompactSearchCriteria(FlightSearchCriteria):
+    rank_by: Literal["earliest", "cheapest"] = "earliest"
+    limit: int = Field(10, ge=1, le=50)
+
+class ItinerarySearchCriteria(BaseModel):
+    origin: str
+    destination: str
+    departure_date: date
+    max_stops: int = Field(1, ge=0, le=2)
+    min_layover_minutes: int = Field(45, ge=0)
+    max_layover_minutes: int = Field(360, ge=0)
+    seat_type: Optional[Literal["economy", "business", "first_class"]] = None
+    num_seats: int = Field(1, ge=1)
+    sort_by: Literal["arrival", "duration", "price"] = "arrival"
+    limit: int = Field(10, ge=1, le=100)
+    compact: bool = False  # columnar rows with flight ids instead of full legs
+
+class FareSearchCriteria(BaseModel):
+    origin: str
+    destination: str
+    start_date: date
+    end_date: Optional[date] = None  # same as start_date when not given
+    seat_type: Literal["economy", "business", "first_class"] = "economy"
+    num_seats: int = Field(1, ge=1)
+    limit: int = Field(10, ge=1, le=100)
+
+class FareCalendarCriteria(BaseModel):
+    origin: str
+    destination: str
+    start_date: date
+    end_date: Optional[date] = None  # 30 days after start_date when not given
+
+class BookingLeg(BaseModel):
+    flight_id: int
+    seat_type: str  # 'economy', 'business', 'first_class'
+    num_seats: int = 1
+
+class BatchBookingRequest(BaseModel):
+    legs: List[BookingLeg] = Field(min_length=1)
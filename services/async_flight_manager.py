@@ -0,0 +1,186 @@
+from typing import Optional
+from fastapi import Depends, HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Flight, FlightModel, get_async_db
+from services.flight_manager import (
+    FLIGHT_COLUMNS,
+    SEAT_COLUMNS,
+    build_cursor_seek_filters,
+    build_flight_search_filters,
+    check_search_paging,
+    decode_search_cursor,
+    encode_search_cursor,
+    update_flight_views
+)
+from services.metrics import instrumented, record_rows_returned
+from services.search_cache import database_scope, search_cache, search_cache_key, search_window
+import logging
+
+# Create a logger for this module
+logger = logging.getLogger(__name__)
+
+async def count_matches(statement, db: AsyncSession) -> int:
+    return await db.scalar(select(func.count()).select_from(statement.order_by(None).subquery()))
+
+async def search_flights_by_cursor_async(statement, db: AsyncSession, page_size: int, cursor: Optional[str] = None, include_total: bool = False):
+    """
+    Async version of `search_flights_by_cursor`, taking an ordered `select(*FLIGHT_COLUMNS)` statement.
+    """
+    result = {}
+
+    if include_total:
+        total_count = await count_matches(statement, db)
+        result["total_pages"] = (total_count + page_size - 1) // page_size
+
+    page_statement = statement
+    if cursor:
+        try:
+            last_departure_time, last_flight_id = decode_search_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+        page_statement = page_statement.where(*build_cursor_seek_filters(last_departure_time, last_flight_id))
+
+    # Fetch one extra row to learn whether another page exists without counting
+    flights = (await db.execute(page_statement.limit(page_size + 1))).all()
+    has_next_page = len(flights) > page_size
+    flights = flights[:page_size]
+
+    flight_rows = [flight._asdict() for flight in flights]
+    record_rows_returned(len(flight_rows))
+
+    result.update({
+        "query_results": len(flight_rows),
+        "flights": flight_rows,
+        "page_size": page_size,
+        "next_cursor": encode_search_cursor(flights[-1].departure_time, flights[-1].flight_id) if has_next_page else None
+    })
+
+    if not flight_rows and not cursor:
+        result["message"] = "There were no flights found for the search criteria."
+
+    return result
+
+@instrumented("handle_flight_search_async")
+async def handle_flight_search_async(criteria, db: AsyncSession, page: Optional[int] = 1, page_size: Optional[int] = 10, cursor: Optional[str] = None, pagination: str = "offset", include_total: Optional[bool] = None, use_cache: bool = True):
+    """
+    Async version of `handle_flight_search`, running on an AsyncSession so the request does not hold a
+    worker thread while it waits on the database. Parameters, responses and the search cache are shared
+    with the sync version.
+    """
+    if not use_cache:
+        return await query_flight_search_async(criteria, db, page, page_size, cursor, pagination, include_total)
+
+    cache_key = search_cache_key(database_scope(db.bind), criteria, page, page_size, cursor, pagination, include_total)
+    cached_result = search_cache.get(cache_key)
+    if cached_result is not None:
+        return cached_result
+
+    route_version = search_cache.route_version(criteria.origin, criteria.destination)
+    result = await query_flight_search_async(criteria, db, page, page_size, cursor, pagination, include_total)
+
+    if isinstance(result, dict):
+        search_cache.put(cache_key, result, criteria.origin, criteria.destination, *search_window(criteria), route_version)
+
+    return result
+
+async def query_flight_search_async(criteria, db: AsyncSession, page: Optional[int] = 1, page_size: Optional[int] = 10, cursor: Optional[str] = None, pagination: str = "offset", include_total: Optional[bool] = None):
+    """
+    Runs a flight search against the database, bypassing the search cache.
+    """
+    try:
+        filters = build_flight_search_filters(criteria)
+    except ValueError:
+        logging.error("Arrival date present but invalid as data type")
+        raise HTTPException(500, "Arrival date present but invalid as data type")
+
+    check_search_paging(page, page_size)
+
+    statement = select(*FLIGHT_COLUMNS).where(*filters).order_by(Flight.departure_time, Flight.flight_id)
+
+    if cursor or pagination == "cursor":
+        return await search_flights_by_cursor_async(statement, db, page_size, cursor, bool(include_total))
+
+    if include_total is False:
+        flights = (await db.execute(statement.offset((page - 1) * page_size).limit(page_size))).all()
+        flight_rows = [flight._asdict() for flight in flights]
+        record_rows_returned(len(flight_rows))
+        return {
+            "query_results": len(flight_rows),
+            "flights": flight_rows,
+            "page": page
+        }
+
+    total_count = await count_matches(statement, db)
+
+    if total_count == 0:
+        return {
+            "message": "There were no flights found for the search criteria.",
+            "flights": [],
+            "page": page,
+            "total_pages": 0
+        }
+
+    total_pages = (total_count + page_size - 1) // page_size
+
+    if page > total_pages:
+        return {
+            "message": "The requested page exceeds the total number of available pages.",
+            "flights": [],
+            "page": page,
+            "total_pages": total_pages
+        }
+
+    flights = (await db.execute(statement.offset((page - 1) * page_size).limit(page_size))).all()
+    flight_rows = [flight._asdict() for flight in flights]
+    record_rows_returned(len(flight_rows))
+
+    return {
+        "query_results": len(flight_rows),
+        "flights": flight_rows,
+        "page": page,
+        "total_pages": total_pages
+    }
+
+@instrumented("handle_flight_book_async")
+async def handle_flight_book_async(flight_id: int, seat_type: str, num_seats: int = 1, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async version of `handle_flight_book`, taking the same arguments in the same order. Seats are
+    checked and decremented in the same single conditional UPDATE, so concurrent bookings can
+    never oversell a flight.
+    """
+    if num_seats < 1:
+        return "Number of seats must be at least 1."
+
+    if seat_type not in SEAT_COLUMNS:
+        return f"Not enough {seat_type} seats available."
+
+    seats_column, cost_column = SEAT_COLUMNS[seat_type]
+
+    result = await db.execute(
+        update(Flight)
+        .where(Flight.flight_id == flight_id, seats_column >= num_seats)
+        .values({seats_column: seats_column - num_seats})
+        .execution_options(synchronize_session=False)
+    )
+
+    if result.rowcount == 0:
+        flight_exists = await db.scalar(select(Flight.flight_id).where(Flight.flight_id == flight_id)) is not None
+        await db.rollback()
+
+        if not flight_exists:
+            return "Flight not found."
+
+        return f"Not enough {seat_type} seats available."
+
+    await db.commit()
+
+    flight = await db.get(Flight, flight_id, populate_existing=True)
+    search_cache.invalidate(flight.origin, flight.destination, flight.departure_time)
+    update_flight_views(db.bind, [flight])
+    total_cost = getattr(flight, cost_column.key) * num_seats
+
+    success_message = f"Successfully booked {num_seats} {seat_type} seat(s) on {flight.airline} flight on {flight.departure_date} from {flight.origin} to {flight.destination}. Total cost: ${total_cost}."
+
+    return {"message": success_message, "flight_info": FlightModel.model_validate(flight)}
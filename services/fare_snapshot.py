@@ -0,0 +1,283 @@
+import os
+import threading
+import time as clock
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+
+from models import Flight
+from services.route_graph import to_graph_flight
+from services.search_cache import database_scope
+
+# Optional dependency, the snapshot is only available when NumPy is installed. It is imported by
+# `require_numpy` when the first snapshot is built, so importing this module stays cheap.
+np = None
+
+def require_numpy():
+    """
+    Imports NumPy on first use.
+
+    Raises:
+    - RuntimeError: If NumPy is not installed.
+    """
+    global np
+
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("Fare queries require NumPy, install it with `pip install numpy`")
+        np = numpy
+
+    return np
+
+# How long a loaded snapshot is trusted before it is rebuilt from the database. Writes made through
+# this process update it immediately, so this only bounds staleness from other processes.
+FARE_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("FARE_SNAPSHOT_MAX_AGE_SECONDS", "300"))
+
+CABINS = ("economy", "business", "first_class")
+
+# Columns copied into the snapshot: the flight, its route and departure, then open seats and cost per cabin in CABINS order
+SNAPSHOT_COLUMNS = (
+    Flight.flight_id, Flight.origin, Flight.destination, Flight.departure_time,
+    Flight.open_seats_economy, Flight.open_seats_business, Flight.open_seats_first_class,
+    Flight.economy_seat_cost, Flight.business_seat_cost, Flight.first_class_cost
+)
+SNAPSHOT_FIELDS = tuple(column.key for column in SNAPSHOT_COLUMNS)
+
+# Departure times in epoch seconds fit in 33 bits until the year 2242, so the route code goes in
+# the bits above them and one int64 key sorts rows by route, then departure
+ROUTE_SHIFT = 33
+
+SECONDS_PER_DAY = 86400
+
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
+def to_epoch_seconds(values):
+    # Plain datetime arithmetic is several times faster than having NumPy parse datetime objects
+    return np.fromiter(((value - EPOCH) // ONE_SECOND for value in values), np.int64, len(values))
+
+class FareSnapshot:
+    """
+    Read-optimized, columnar copy of the fares and open seats of every flight.
+
+    Rows are kept in NumPy arrays sorted by (route, departure time), so the flights of a route in a
+    date range are one contiguous slice found by binary search, and fare queries over them run as
+    vectorized masks and reductions instead of SQL scans over unindexed cost columns.
+
+    Like the route graph, it is updated in place by writes made through this process.
+    """
+
+    def __init__(self, rows=()):
+        require_numpy()
+        self._lock = threading.Lock()
+        self._route_codes = {}
+        self.built_at = clock.monotonic()
+
+        columns = self._columns(list(rows))
+        order = np.argsort(columns["sort_key"], kind="stable")
+
+        self.sort_key = columns["sort_key"][order]
+        self.flight_id = columns["flight_id"][order]
+        self.departure = columns["departure"][order]
+        self.seats = columns["seats"][:, order]
+        self.cost = columns["cost"][:, order]
+        self._reindex()
+
+    def __len__(self):
+        return len(self.flight_id)
+
+    def _columns(self, rows):
+        """
+        Converts tuples of SNAPSHOT_FIELDS values into snapshot columns.
+        """
+        count = len(rows)
+        if count == 0:
+            return {
+                "sort_key": np.empty(0, np.int64),
+                "flight_id": np.empty(0, np.int64),
+                "departure": np.empty(0, np.int64),
+                "seats": np.empty((len(CABINS), 0), np.int32),
+                "cost": np.empty((len(CABINS), 0), np.int32)
+            }
+
+        flight_ids, origins, destinations, departures, *cabin_values = zip(*rows)
+        route_codes = np.fromiter((self._route_code(origin, destination) for origin, destination in zip(origins, destinations)), np.int64, count)
+        departure_epochs = to_epoch_seconds(departures)
+
+        return {
+            "sort_key": (route_codes << ROUTE_SHIFT) | departure_epochs,
+            "flight_id": np.array(flight_ids, dtype=np.int64),
+            "departure": departure_epochs,
+            "seats": np.array(cabin_values[:len(CABINS)], dtype=np.int32),
+            "cost": np.array(cabin_values[len(CABINS):], dtype=np.int32)
+        }
+
+    def _route_code(self, origin: str, destination: str) -> int:
+        code = self._route_codes.get((origin, destination))
+        if code is None:
+            code = self._route_codes[(origin, destination)] = len(self._route_codes)
+        return code
+
+    def _reindex(self):
+        # Dense flight_id -> row lookup, rebuilt whenever rows move
+        size = int(self.flight_id.max()) + 1 if len(self.flight_id) else 0
+        self._position_by_id = np.full(size, -1, np.int64)
+        self._position_by_id[self.flight_id] = np.arange(len(self.flight_id))
+
+    def upsert(self, flights):
+        """
+        Refreshes the open seats and costs of flights already in the snapshot and inserts new ones
+        in sort order.
+
+        Parameters:
+        - flights: Flight objects, row mappings or dictionaries of column values including flight_id.
+        """
+        rows = [tuple(getattr(flight, field) for field in SNAPSHOT_FIELDS) for flight in map(to_graph_flight, flights)]
+        if not rows:
+            return
+
+        with self._lock:
+            columns = self._columns(rows)
+            flight_ids = columns["flight_id"]
+
+            positions = np.full(len(flight_ids), -1, np.int64)
+            known = flight_ids < len(self._position_by_id)
+            positions[known] = self._position_by_id[flight_ids[known]]
+            existing = positions >= 0
+
+            self.seats[:, positions[existing]] = columns["seats"][:, existing]
+            self.cost[:, positions[existing]] = columns["cost"][:, existing]
+
+            new = ~existing
+            if not new.any():
+                return
+
+            order = np.flatnonzero(new)[np.argsort(columns["sort_key"][new], kind="stable")]
+            insert_at = np.searchsorted(self.sort_key, columns["sort_key"][order], side="right")
+
+            self.sort_key = np.insert(self.sort_key, insert_at, columns["sort_key"][order])
+            self.flight_id = np.insert(self.flight_id, insert_at, flight_ids[order])
+            self.departure = np.insert(self.departure, insert_at, columns["departure"][order])
+            self.seats = np.insert(self.seats, insert_at, columns["seats"][:, order], axis=1)
+            self.cost = np.insert(self.cost, insert_at, columns["cost"][:, order], axis=1)
+            self._reindex()
+
+    def _available(self, origin: str, destination: str, cabin: str, start_date: date, end_date: date, min_seats: int):
+        """
+        Returns the flight ids, departure epochs and costs of the route's flights departing between
+        the two dates (inclusive) with at least `min_seats` open seats in the cabin, in departure order.
+        """
+        code = self._route_codes.get((origin, destination))
+        if code is None:
+            return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int32)
+
+        cabin_index = CABINS.index(cabin)
+        start_key = (code << ROUTE_SHIFT) | (datetime.combine(start_date, time.min) - EPOCH) // ONE_SECOND
+        end_key = (code << ROUTE_SHIFT) | (datetime.combine(end_date, time.max) - EPOCH) // ONE_SECOND
+        rows = slice(np.searchsorted(self.sort_key, start_key, side="left"), np.searchsorted(self.sort_key, end_key, side="right"))
+
+        mask = self.seats[cabin_index, rows] >= min_seats
+        return self.flight_id[rows][mask], self.departure[rows][mask], self.cost[cabin_index, rows][mask]
+
+    def cheapest(self, origin: str, destination: str, cabin: str, start_date: date, end_date: date, limit: int = 10, min_seats: int = 1):
+        """
+        Finds the `limit` cheapest flights in a cabin between two dates.
+
+        Returns:
+        A list of (flight_id, cost) tuples, cheapest first and earliest first among equal costs.
+        """
+        with self._lock:
+            flight_ids, departures, costs = self._available(origin, destination, cabin, start_date, end_date, min_seats)
+
+        # Select the cheapest rows in linear time, then sort only those. Every row costing as much
+        # as the limit-th cheapest is kept, so ties at the cut are broken by departure and flight_id
+        # below rather than by the partition's arbitrary order.
+        if len(costs) > limit:
+            cheapest_rows = costs <= np.partition(costs, limit - 1)[limit - 1]
+            flight_ids, departures, costs = flight_ids[cheapest_rows], departures[cheapest_rows], costs[cheapest_rows]
+
+        order = np.lexsort((flight_ids, departures, costs))[:limit]
+        return list(zip(flight_ids[order].tolist(), costs[order].tolist()))
+
+    def daily_fares(self, origin: str, destination: str, cabin: str, start_date: date, end_date: date, min_seats: int = 1):
+        """
+        Summarizes the fares in a cabin per departure day between two dates.
+
+        Returns:
+        A list with one dictionary per day that has available flights: the date, the number of
+        flights and their minimum and median cost.
+        """
+        with self._lock:
+            _, departures, costs = self._available(origin, destination, cabin, start_date, end_date, min_seats)
+
+        if len(costs) == 0:
+            return []
+
+        # Rows are in departure order, so each day is a contiguous run
+        days = departures // SECONDS_PER_DAY
+        day_values, day_starts, day_counts = np.unique(days, return_index=True, return_counts=True)
+
+        minimum_costs = np.minimum.reduceat(costs, day_starts)
+        sorted_costs = costs[np.lexsort((costs, days))]
+        median_costs = (sorted_costs[day_starts + (day_counts - 1) // 2] + sorted_costs[day_starts + day_counts // 2]) / 2
+
+        return [
+            {"date": day, "flights": count, "min_cost": minimum, "median_cost": median}
+            for day, count, minimum, median in zip(
+                day_values.astype("datetime64[D]").tolist(),
+                day_counts.tolist(),
+                minimum_costs.tolist(),
+                median_costs.tolist()
+            )
+        ]
+
+# One snapshot per database, loaded on first use
+_fare_snapshots = {}
+_fare_snapshots_lock = threading.Lock()
+
+def load_fare_snapshot(db) -> FareSnapshot:
+    """
+    Builds a fare snapshot from every flight in the database.
+    """
+    # Core execution on the session's connection skips ORM row processing
+    return FareSnapshot(db.connection().execute(select(*SNAPSHOT_COLUMNS)).all())
+
+def get_fare_snapshot(db) -> FareSnapshot:
+    """
+    Returns the fare snapshot of the session's database, loading it on first use and rebuilding it
+    once it is older than FARE_SNAPSHOT_MAX_AGE_SECONDS.
+
+    Raises:
+    - RuntimeError: If NumPy is not installed.
+    """
+    require_numpy()
+
+    scope = database_scope(db.bind)
+
+    with _fare_snapshots_lock:
+        snapshot = _fare_snapshots.get(scope)
+        if snapshot is None or clock.monotonic() - snapshot.built_at > FARE_SNAPSHOT_MAX_AGE_SECONDS:
+            snapshot = _fare_snapshots[scope] = load_fare_snapshot(db)
+
+    return snapshot
+
+def loaded_fare_snapshot(bind) -> Optional[FareSnapshot]:
+    """
+    Returns the fare snapshot of the database behind `bind` if it has been loaded, else None.
+    """
+    return _fare_snapshots.get(database_scope(bind))
+
+def update_fare_snapshot(bind, flights):
+    """
+    Applies committed flight writes to the database's fare snapshot, if it is loaded.
+    """
+    snapshot = loaded_fare_snapshot(bind)
+    if snapshot is not None:
+        snapshot.upsert(flights)
+
+def clear_fare_snapshots():
+    with _fare_snapshots_lock:
+        _fare_snapshots.clear()
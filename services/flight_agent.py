@@ -0,0 +1,351 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+from services.flight_client import book_flight, confirm_hold, hold_seats, search_flights_compact, search_itineraries
+
+# Create a logger for this module
+logger = logging.getLogger(__name__)
+
+# Model behind the chat agent: a Vertex AI model name, or "stub" for the offline stand-in in services.stub_model
+FLIGHT_AGENT_MODEL = os.getenv("FLIGHT_AGENT_MODEL", "gemini-pro")
+VERTEX_PROJECT = os.getenv("VERTEX_PROJECT", "sample-gemini")
+# Threads running the function calls of a model turn concurrently
+FLIGHT_AGENT_WORKERS = int(os.getenv("FLIGHT_AGENT_WORKERS", "8"))
+# Largest JSON size in bytes of one tool response sent back to the model; tables are cut to fit
+FLIGHT_AGENT_MAX_TOOL_BYTES = int(os.getenv("FLIGHT_AGENT_MAX_TOOL_BYTES", "4096"))
+# Largest combined JSON size in bytes of the tool responses of one model turn, shared evenly
+# between the function calls run in parallel
+FLIGHT_AGENT_MAX_TURN_BYTES = int(os.getenv("FLIGHT_AGENT_MAX_TURN_BYTES", "8192"))
+
+# Function declarations offered to the model, as plain OpenAPI style schemas
+TOOL_DECLARATIONS = [
+    {
+        "name": "get_search_flights",
+        "description": "Tool for searching a flight with origin, destination, and departure date",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "origin": {
+                    "type": "string",
+                    "description": "The airport of departure for the flight given in airport code such as LAX, SFO, BOS, etc."
+                },
+                "destination": {
+                    "type": "string",
+                    "description": "The airport of destination for the flight given in airport code such as LAX, SFO, BOS, etc."
+                },
+                "departure_date": {
+                    "type": "string",
+                    "format": "date",
+                    "description": "The date of departure for the flight in YYYY-MM-DD format"
+                },
+                "seat_type": {
+                    "type": "string",
+                    "enum": ["economy", "business", "first_class"],
+                    "description": "The class the user wants to fly in, if they said so"
+                },
+                "rank_by": {
+                    "type": "string",
+                    "enum": ["earliest", "cheapest"],
+                    "description": "Whether to list the earliest or the cheapest flights first"
+                },
+            },
+            "required": [
+                "origin",
+                "destination",
+                "departure_date"
+            ]
+        },
+    },
+    {
+        "name": "book_flight",
+        "description": "Tool for booking seats on a flight found by a search, using its flight_id",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "flight_id": {
+                    "type": "integer",
+                    "description": "The flight_id of the flight to book, as returned by the search tool"
+                },
+                "seat_type": {
+                    "type": "string",
+                    "enum": ["economy", "business", "first_class"],
+                    "description": "The class of the seats to book"
+                },
+                "num_seats": {
+                    "type": "integer",
+                    "description": "The number of seats to book, 1 if not given"
+                },
+            },
+            "required": [
+                "flight_id",
+                "seat_type"
+            ]
+        },
+    },
+    {
+        "name": "hold_seats",
+        "description": "Tool for reserving seats on a flight for a few minutes while the user decides, so they are not sold to someone else",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "flight_id": {
+                    "type": "integer",
+                    "description": "The flight_id of the flight, as returned by the search tool"
+                },
+                "seat_type": {
+                    "type": "string",
+                    "enum": ["economy", "business", "first_class"],
+                    "description": "The class of the seats to hold"
+                },
+                "num_seats": {
+                    "type": "integer",
+                    "description": "The number of seats to hold, 1 if not given"
+                },
+            },
+            "required": [
+                "flight_id",
+                "seat_type"
+            ]
+        },
+    },
+    {
+        "name": "confirm_hold",
+        "description": "Tool for booking the seats of a hold once the user confirms",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "hold_id": {
+                    "type": "integer",
+                    "description": "The hold_id returned by the hold_seats tool"
+                },
+            },
+            "required": [
+                "hold_id"
+            ]
+        },
+    },
+]
+
+def search_flights_or_itineraries(**params):
+    """
+    Searches for direct flights on the requested day, and for connecting itineraries with up to
+    two stops when there is no direct flight that day. Both come back as compact tables, ranked
+    as the model asked.
+    """
+    results = search_flights_compact(**params)
+
+    # No direct flight, so offer connecting itineraries instead of failing
+    if results and not results.get("rows"):
+        itineraries = search_itineraries(
+            origin=params["origin"],
+            destination=params["destination"],
+            departure_date=params["departure_date"],
+            max_stops=2,
+            seat_type=params.get("seat_type"),
+            sort_by="price" if params.get("rank_by") == "cheapest" else "arrival",
+            limit=5,
+            compact=True
+        )
+        if itineraries.get("itineraries"):
+            results = itineraries
+
+    return results
+
+# Functions run for each declared tool
+TOOL_FUNCTIONS = {
+    "get_search_flights": search_flights_or_itineraries,
+    "book_flight": book_flight,
+    "hold_seats": hold_seats,
+    "confirm_hold": confirm_hold,
+}
+
+def create_model(model_name: str = FLIGHT_AGENT_MODEL):
+    """
+    Creates the chat model with the flight tools.
+
+    Parameters:
+    - model_name (str): A Vertex AI model name, or "stub" for `services.stub_model.StubGenerativeModel`,
+      which answers locally without credentials or network access.
+    """
+    if model_name == "stub":
+        from services.stub_model import StubGenerativeModel
+        return StubGenerativeModel()
+
+    # Imported here, so the stub and the tool functions work without the Vertex AI SDK
+    import vertexai
+    from vertexai.preview import generative_models
+
+    vertexai.init(project=VERTEX_PROJECT)
+
+    # Define tool and model with tools
+    flight_tool = generative_models.Tool(
+        function_declarations=[generative_models.FunctionDeclaration(**declaration) for declaration in TOOL_DECLARATIONS],
+    )
+    config = generative_models.GenerationConfig(temperature=0.4)
+
+    return generative_models.GenerativeModel(
+        model_name,
+        tools=[flight_tool],
+        generation_config=config
+    )
+
+def vertex_function_response(name: str, response: dict):
+    from vertexai.preview.generative_models import Part
+    return Part.from_function_response(name=name, response=response)
+
+def payload_bytes(response) -> int:
+    """
+    Returns the size of a tool response as compact JSON, roughly what it adds to the prompt.
+    """
+    return len(json.dumps(response, separators=(",", ":"), default=str).encode())
+
+def trim_response(response, max_bytes: int = FLIGHT_AGENT_MAX_TOOL_BYTES):
+    """
+    Drops the last rows of a tabular tool response ("rows" or "itineraries") until it fits in
+    `max_bytes`, and marks it `trimmed`. Rows are ranked, so the ones dropped matter least.
+    Other responses are returned unchanged.
+    """
+    if not isinstance(response, dict):
+        return response
+
+    key = "rows" if "rows" in response else "itineraries"
+    if not isinstance(response.get(key), list) or payload_bytes(response) <= max_bytes:
+        return response
+
+    # Copied, since results may be shared with the search cache
+    trimmed = dict(response, trimmed=True)
+    trimmed[key] = list(response[key])
+    while trimmed[key] and payload_bytes(trimmed) > max_bytes:
+        trimmed[key].pop()
+    trimmed["query_results"] = len(trimmed[key])
+
+    return trimmed
+
+def part_function_call(part):
+    """
+    Returns the (name, arguments) of a response part that is a function call, else None.
+    """
+    function_call = getattr(part, "function_call", None)
+    if function_call is None or not function_call.name:
+        return None
+
+    return function_call.name, {key: value for key, value in function_call.args.items()}
+
+def part_text(part) -> str:
+    # Vertex AI raises instead of returning an empty string for parts without text
+    try:
+        return part.text or ""
+    except (AttributeError, ValueError):
+        return ""
+
+# Thread pool shared by every agent, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FLIGHT_AGENT_WORKERS, thread_name_prefix="flight-agent")
+
+    return _executor
+
+class FlightAgent:
+    """
+    Chat agent that answers with the flight tools.
+
+    Every function call in a model turn is run concurrently on a thread pool, and the model's text
+    is streamed back chunk by chunk as it is generated. Function results are cut to `max_tool_bytes`
+    each, and to an even share of `max_turn_bytes` when a turn makes several calls, before they are
+    sent to the model. Their sizes for the last message are kept in `tool_response_bytes`.
+
+    Parameters:
+    - chat: A chat session, from `GenerativeModel.start_chat()` or the stub model.
+    - functions (dict, optional): Tool name to function, default is TOOL_FUNCTIONS.
+    - function_response (optional): Callable building the message part for a function result from
+      (name, response). Default is the model's own `function_response`, else Vertex AI's `Part.from_function_response`.
+    - max_rounds (int): How many rounds of function calls one message may trigger.
+    - max_tool_bytes (int): Largest JSON size of one function result, default is FLIGHT_AGENT_MAX_TOOL_BYTES.
+    - max_turn_bytes (int): Largest combined JSON size of the function results of one turn, default is
+      FLIGHT_AGENT_MAX_TURN_BYTES. Only tables can be cut, so short non-tabular results may exceed it.
+    """
+
+    def __init__(self, chat, functions: Optional[dict] = None, function_response=None, max_rounds: int = 5, max_tool_bytes: int = FLIGHT_AGENT_MAX_TOOL_BYTES, max_turn_bytes: int = FLIGHT_AGENT_MAX_TURN_BYTES):
+        self.chat = chat
+        self.functions = functions if functions is not None else TOOL_FUNCTIONS
+        self.function_response = function_response or vertex_function_response
+        self.max_rounds = max_rounds
+        self.max_tool_bytes = max_tool_bytes
+        self.max_turn_bytes = max_turn_bytes
+        self.tool_response_bytes = []
+
+    def send(self, message) -> Iterator[str]:
+        """
+        Sends a user message and yields the text of the answer as it streams in. Function calls
+        requested by the model are run, and their results sent back, until it answers with text.
+        """
+        content = message
+        self.tool_response_bytes = []
+
+        for _ in range(self.max_rounds):
+            calls = []
+            for chunk in self.chat.send_message(content, stream=True):
+                for part in chunk.candidates[0].content.parts:
+                    call = part_function_call(part)
+                    if call is not None:
+                        calls.append(call)
+                        continue
+
+                    text = part_text(part)
+                    if text:
+                        yield text
+
+            if not calls:
+                return
+
+            max_bytes = min(self.max_tool_bytes, self.max_turn_bytes // len(calls))
+            results = [trim_response(result, max_bytes) for result in self.run_function_calls(calls)]
+            for (name, _), result in zip(calls, results):
+                size = payload_bytes(result)
+                self.tool_response_bytes.append((name, size))
+                logger.info("Function call %s returned %d bytes", name, size)
+
+            content = [self.function_response(name, result) for (name, _), result in zip(calls, results)]
+
+        yield "Sorry, I could not complete that request."
+
+    def run_function_calls(self, calls: List[tuple]) -> List[dict]:
+        """
+        Runs (name, arguments) function calls concurrently.
+
+        Returns:
+        The result of each call in call order. A call that fails returns {"error": message} instead,
+        so the model can explain the failure rather than the turn breaking.
+        """
+        if len(calls) == 1:
+            return [self.call_function(*calls[0])]
+
+        futures = [get_executor().submit(self.call_function, name, args) for name, args in calls]
+        return [future.result() for future in futures]
+
+    def call_function(self, name: str, args: dict) -> dict:
+        function = self.functions.get(name)
+        if function is None:
+            return {"error": f"Unknown function: {name}"}
+
+        try:
+            return function(**args)
+        except Exception as e:
+            logger.exception("Function call %s failed", name)
+            return {"error": str(e)}
+
+def create_agent(model) -> FlightAgent:
+    """
+    Starts a chat with the model and wraps it in a FlightAgent.
+    """
+    return FlightAgent(model.start_chat(), function_response=getattr(model, "function_response", None))
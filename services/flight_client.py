@@ -0,0 +1,359 @@
+import os
+import threading
+from typing import Optional
+from schemas import CompactSearchCriteria, FareCalendarCriteria, FlightSearchCriteria, ItinerarySearchCriteria
+
+# Where the flight API runs and how tool calls reach it: "http" for a separate API server,
+# "inprocess" to call the search handler directly when the API code runs in the same process
+FLIGHT_API_URL = os.getenv("FLIGHT_API_URL", "http://127.0.0.1:8000")
+FLIGHT_API_TRANSPORT = os.getenv("FLIGHT_API_TRANSPORT", "http")
+FLIGHT_API_TIMEOUT = float(os.getenv("FLIGHT_API_TIMEOUT", "10"))
+FLIGHT_API_RETRIES = int(os.getenv("FLIGHT_API_RETRIES", "3"))
+
+def search_query_params(criteria: FlightSearchCriteria, page: int = 1, page_size: int = 10) -> dict:
+    """
+    Converts search criteria into query parameters for /search-flights/, leaving out unset values.
+    Encoding is left to the HTTP client, so values such as airline names with spaces are sent intact.
+    """
+    params = {key: str(value) for key, value in criteria.model_dump(exclude_none=True).items()}
+    params["page"] = page
+    params["page_size"] = page_size
+    return params
+
+def criteria_query_params(criteria) -> dict:
+    """
+    Converts compact search, itinerary search or fare calendar criteria into query parameters, leaving out unset values.
+    """
+    return {key: str(value) for key, value in criteria.model_dump(exclude_none=True).items()}
+
+class FlightSearchClient:
+    """
+    Client for the flight search API that reuses keep-alive connections across calls.
+
+    Parameters:
+    - base_url (str): Root URL of the API, default is FLIGHT_API_URL.
+    - timeout (float): Connect and read timeout in seconds for every request.
+    - retries (int): How often to retry connection errors and 502/503/504 responses, with backoff.
+    - pool_size (int): Maximum number of pooled connections kept open to the API.
+    """
+
+    def __init__(self, base_url: str = FLIGHT_API_URL, timeout: float = FLIGHT_API_TIMEOUT, retries: int = FLIGHT_API_RETRIES, pool_size: int = 10):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+        retry = Retry(total=retries, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=pool_size)
+
+        self.session = requests.Session()
+        self.session.headers["accept"] = "application/json"
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def search_flights(self, criteria: FlightSearchCriteria, page: int = 1, page_size: int = 10) -> dict:
+        response = self.session.get(f"{self.base_url}/search-flights/", params=search_query_params(criteria, page, page_size), timeout=self.timeout)
+        return response.json()
+
+    def search_flights_compact(self, criteria: CompactSearchCriteria) -> dict:
+        response = self.session.get(f"{self.base_url}/search-flights/compact", params=criteria_query_params(criteria), timeout=self.timeout)
+        return response.json()
+
+    def search_itineraries(self, criteria: ItinerarySearchCriteria) -> dict:
+        response = self.session.get(f"{self.base_url}/search-itineraries/", params=criteria_query_params(criteria), timeout=self.timeout)
+        return response.json()
+
+    def fare_calendar(self, criteria: FareCalendarCriteria) -> dict:
+        response = self.session.get(f"{self.base_url}/fare-calendar/", params=criteria_query_params(criteria), timeout=self.timeout)
+        return response.json()
+
+    def book_flight(self, flight_id: int, seat_type: str, num_seats: int = 1) -> dict:
+        # POST is not in the retried methods, so a booking is never sent twice
+        response = self.session.post(f"{self.base_url}/book_flight", params={"flight_id": flight_id, "seat_type": seat_type, "num_seats": num_seats}, timeout=self.timeout)
+        return response.json()
+
+    def hold_seats(self, flight_id: int, seat_type: str, num_seats: int = 1) -> dict:
+        response = self.session.post(f"{self.base_url}/holds", params={"flight_id": flight_id, "seat_type": seat_type, "num_seats": num_seats}, timeout=self.timeout)
+        return response.json()
+
+    def confirm_hold(self, hold_id: int) -> dict:
+        response = self.session.post(f"{self.base_url}/holds/{hold_id}/confirm", timeout=self.timeout)
+        return response.json()
+
+    def release_hold(self, hold_id: int) -> dict:
+        response = self.session.delete(f"{self.base_url}/holds/{hold_id}", timeout=self.timeout)
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+class AsyncFlightSearchClient:
+    """
+    httpx based async counterpart of `FlightSearchClient`, for callers running on an event loop.
+    """
+
+    def __init__(self, base_url: str = FLIGHT_API_URL, timeout: float = FLIGHT_API_TIMEOUT, retries: int = FLIGHT_API_RETRIES, pool_size: int = 10):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout,
+            headers={"accept": "application/json"},
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            # httpx retries connection failures only, which is what is safe to retry blindly
+            transport=httpx.AsyncHTTPTransport(retries=retries)
+        )
+
+    async def search_flights(self, criteria: FlightSearchCriteria, page: int = 1, page_size: int = 10) -> dict:
+        response = await self.client.get("/search-flights/", params=search_query_params(criteria, page, page_size))
+        return response.json()
+
+    async def search_flights_compact(self, criteria: CompactSearchCriteria) -> dict:
+        response = await self.client.get("/search-flights/compact", params=criteria_query_params(criteria))
+        return response.json()
+
+    async def search_itineraries(self, criteria: ItinerarySearchCriteria) -> dict:
+        response = await self.client.get("/search-itineraries/", params=criteria_query_params(criteria))
+        return response.json()
+
+    async def fare_calendar(self, criteria: FareCalendarCriteria) -> dict:
+        response = await self.client.get("/fare-calendar/", params=criteria_query_params(criteria))
+        return response.json()
+
+    async def book_flight(self, flight_id: int, seat_type: str, num_seats: int = 1) -> dict:
+        response = await self.client.post("/book_flight", params={"flight_id": flight_id, "seat_type": seat_type, "num_seats": num_seats})
+        return response.json()
+
+    async def hold_seats(self, flight_id: int, seat_type: str, num_seats: int = 1) -> dict:
+        response = await self.client.post("/holds", params={"flight_id": flight_id, "seat_type": seat_type, "num_seats": num_seats})
+        return response.json()
+
+    async def confirm_hold(self, hold_id: int) -> dict:
+        response = await self.client.post(f"/holds/{hold_id}/confirm")
+        return response.json()
+
+    async def release_hold(self, hold_id: int) -> dict:
+        response = await self.client.delete(f"/holds/{hold_id}")
+        return response.json()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+class InProcessFlightSearchClient:
+    """
+    Calls `handle_flight_search` directly instead of going through HTTP, for when the API code
+    and its database are available in the same process. Results have the same shape as the JSON
+    the HTTP clients return.
+
+    Parameters:
+    - session_factory (optional): Callable returning a database session, default is models.SessionLocal.
+    """
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from models import SessionLocal, init_db
+            init_db()
+            session_factory = SessionLocal
+
+        self.session_factory = session_factory
+
+    def search_flights(self, criteria: FlightSearchCriteria, page: int = 1, page_size: int = 10) -> dict:
+        from fastapi import HTTPException
+        from fastapi.encoders import jsonable_encoder
+        from services.flight_manager import handle_flight_search
+
+        with self.session_factory() as db:
+            try:
+                result = handle_flight_search(criteria, db, page, page_size)
+            except HTTPException as e:
+                # Same body FastAPI sends for a raised HTTPException
+                return {"detail": e.detail}
+
+        return jsonable_encoder(result)
+
+    def search_flights_compact(self, criteria: CompactSearchCriteria) -> dict:
+        from services.flight_manager import handle_compact_flight_search
+        return self._call(handle_compact_flight_search, criteria)
+
+    def search_itineraries(self, criteria: ItinerarySearchCriteria) -> dict:
+        from services.flight_manager import handle_itinerary_search
+        return self._call(handle_itinerary_search, criteria)
+
+    def fare_calendar(self, criteria: FareCalendarCriteria) -> dict:
+        from services.flight_manager import handle_fare_calendar
+        return self._call(handle_fare_calendar, criteria)
+
+    def book_flight(self, flight_id: int, seat_type: str, num_seats: int = 1) -> dict:
+        from services.flight_manager import handle_flight_book
+        return self._call_with_session(handle_flight_book, flight_id, seat_type, num_seats)
+
+    def hold_seats(self, flight_id: int, seat_type: str, num_seats: int = 1) -> dict:
+        from services.seat_holds import handle_hold_seats
+        return self._call_with_session(handle_hold_seats, flight_id, seat_type, num_seats)
+
+    def confirm_hold(self, hold_id: int) -> dict:
+        from services.seat_holds import handle_confirm_hold
+        return self._call_with_session(handle_confirm_hold, hold_id)
+
+    def release_hold(self, hold_id: int) -> dict:
+        from services.seat_holds import handle_release_hold
+        return self._call_with_session(handle_release_hold, hold_id)
+
+    def _call_with_session(self, handler, *args) -> dict:
+        from fastapi.encoders import jsonable_encoder
+
+        with self.session_factory() as db:
+            result = handler(*args, db)
+
+        # Same body as the /book_flight and /holds endpoints
+        return jsonable_encoder({"message": result})
+
+    def _call(self, handler, criteria) -> dict:
+        from fastapi import HTTPException
+        from fastapi.encoders import jsonable_encoder
+
+        with self.session_factory() as db:
+            try:
+                result = handler(criteria, db)
+            except HTTPException as e:
+                # Same body FastAPI sends for a raised HTTPException
+                return {"detail": e.detail}
+
+        return jsonable_encoder(result)
+
+    def close(self):
+        pass
+
+# Shared client used by `search_flights`, created on first use. The agent runs tool calls on
+# several threads at once, so creation is locked to build exactly one.
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_flight_client(transport: Optional[str] = None):
+    """
+    Returns the shared flight search client for the configured transport ("http" or "inprocess").
+    """
+    global _default_client
+
+    transport = transport or FLIGHT_API_TRANSPORT
+    if transport not in ("http", "inprocess"):
+        raise ValueError(f"Unknown flight API transport: {transport}")
+
+    client_class = InProcessFlightSearchClient if transport == "inprocess" else FlightSearchClient
+    with _default_client_lock:
+        if not isinstance(_default_client, client_class):
+            # The client being replaced is not closed: agent threads may still be mid-request on it.
+            # Its pooled connections are released once the last of them drops it, or at process exit.
+            _default_client = client_class()
+
+    return _default_client
+
+def fare_calendar(**params):
+    """
+    Gets the per-day fare summary of a route through the flight API.
+
+    Parameters:
+    - params: Keyword arguments for FareCalendarCriteria (origin, destination, start_date, end_date).
+
+    Returns:
+    The fare calendar response as a JSON object.
+    """
+    criteria = FareCalendarCriteria(**params)
+
+    return get_flight_client().fare_calendar(criteria)
+
+def search_itineraries(**params):
+    """
+    Searches for direct and connecting itineraries through the flight API, the same way
+    `search_flights` searches for direct flights.
+
+    Parameters:
+    - params: Keyword arguments for ItinerarySearchCriteria (origin, destination, departure_date, max_stops, ...).
+
+    Returns:
+    The itinerary search response as a JSON object.
+    """
+    criteria = ItinerarySearchCriteria(**params)
+
+    return get_flight_client().search_itineraries(criteria)
+
+def search_flights(**params):
+    """
+    Searches for flights through the flight API. This is the function behind the Gemini
+    `get_search_flights` tool.
+
+    Parameters:
+    - params: Keyword arguments for FlightSearchCriteria (origin, destination, departure_date, ...).
+
+    The request goes through the shared client from `services.flight_client.get_flight_client`, which
+    keeps connections alive between calls and applies timeouts and retries. With FLIGHT_API_TRANSPORT
+    set to "inprocess", it calls `handle_flight_search` directly instead of making an HTTP request.
+
+    Returns:
+    The search response as a JSON object.
+    """
+    # Create an instance of FlightSearchCriteria from the passed arguments
+    criteria = FlightSearchCriteria(**params)
+
+    return get_flight_client().search_flights(criteria, page=1, page_size=10)
+
+def search_flights_compact(**params):
+    """
+    Searches for flights through the flight API, returning the compact ranked table of
+    /search-flights/compact instead of full flight rows. Used for tool responses sent to the model.
+
+    Parameters:
+    - params: Keyword arguments for CompactSearchCriteria (origin, destination, departure_date, seat_type, rank_by, limit, ...).
+
+    Returns:
+    The compact search response as a JSON object.
+    """
+    criteria = CompactSearchCriteria(**params)
+
+    return get_flight_client().search_flights_compact(criteria)
+
+def book_flight(flight_id: int, seat_type: str, num_seats: int = 1):
+    """
+    Books seats on a flight through the flight API. This is the function behind the Gemini
+    `book_flight` tool.
+
+    Parameters:
+    - flight_id (int): The flight to book, as returned by a search.
+    - seat_type (str): The class of the seats (economy, business, or first_class).
+    - num_seats (int, optional): The number of seats to book (default is 1).
+
+    Returns:
+    The booking response as a JSON object, with the booking details or the reason it failed under "message".
+    """
+    return get_flight_client().book_flight(int(flight_id), seat_type, int(num_seats))
+
+def hold_seats(flight_id: int, seat_type: str, num_seats: int = 1):
+    """
+    Reserves seats on a flight through the flight API, for HOLD_TTL_SECONDS unless confirmed or
+    released first. This is the function behind the Gemini `hold_seats` tool.
+
+    Returns:
+    The hold response as a JSON object, with the hold_id and expiry or the reason it failed under "message".
+    """
+    return get_flight_client().hold_seats(int(flight_id), seat_type, int(num_seats))
+
+def confirm_hold(hold_id: int):
+    """
+    Books the seats of a hold through the flight API. This is the function behind the Gemini
+    `confirm_hold` tool.
+
+    Returns:
+    The booking response as a JSON object, with the booking details or the reason it failed under "message".
+    """
+    return get_flight_client().confirm_hold(int(hold_id))
+
+def release_hold(hold_id: int):
+    """
+    Gives the seats of a hold back through the flight API.
+
+    Returns:
+    The release response as a JSON object.
+    """
+    return get_flight_client().release_hold(int(hold_id))
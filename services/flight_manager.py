@@ -1,35 +1,72 @@
+import base64
+import binascii
+import csv
+import io
+import json
 import random
-import requests
+from itertools import islice
 from datetime import datetime, timedelta, time, date
-from dateutil.parser import parse
-from typing import Optional
+from typing import List, Optional
 from fastapi import Depends, HTTPException
-from sqlalchemy import and_, func
+from sqlalchemy import and_, or_, case, func, insert, select, update
 from sqlalchemy.orm import Session
-from models import Flight, FlightModel, FlightSearchCriteria, get_db
+from models import BookingLeg, CompactSearchCriteria, FareCalendarCriteria, FareSearchCriteria, Flight, ItinerarySearchCriteria, get_db
+# The chat agent's tool functions, kept importable from here
+from services.flight_client import book_flight, confirm_hold, fare_calendar, hold_seats, release_hold, search_flights, search_flights_compact, search_itineraries
+from services.metrics import instrumented, record_rows_returned
+from services.fare_snapshot import get_fare_snapshot, loaded_fare_snapshot, update_fare_snapshot
+from services.route_graph import get_route_graph, loaded_route_graph, update_route_graph
+from services.search_cache import database_scope, parse_date, search_cache, search_cache_key, search_window
 import logging
 
 # Create a logger for this module
 logger = logging.getLogger(__name__)
 
-def generate_flight_number():
+# Example airlines
+AIRLINES = ('Phantom', 'DreamSky Airlines', 'VirtualJet', 'Enchanted Air', 'AeroFiction')
+FLIGHT_NUMBER_LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Columns returned by searches, in FlightModel field order
+FLIGHT_COLUMNS = tuple(Flight.__table__.columns)
+
+# Open seat and seat cost columns per seat type
+SEAT_COLUMNS = {
+    "economy": (Flight.open_seats_economy, Flight.economy_seat_cost),
+    "business": (Flight.open_seats_business, Flight.business_seat_cost),
+    "first_class": (Flight.open_seats_first_class, Flight.first_class_cost)
+}
+
+def flight_views_loaded(bind) -> bool:
+    """
+    Whether any in-memory view of the flights table (route graph, fare snapshot) is loaded for
+    the database behind `bind`.
+    """
+    return loaded_route_graph(bind) is not None or loaded_fare_snapshot(bind) is not None
+
+def update_flight_views(bind, flights):
+    """
+    Applies committed flight writes to the loaded in-memory views of the database behind `bind`.
+    """
+    flights = list(flights)
+    update_route_graph(bind, flights)
+    update_fare_snapshot(bind, flights)
+
+def generate_flight_number(rng=random):
     # Example: AA342
-    return f"{random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}{random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}{random.randint(100, 999)}"
+    return f"{''.join(rng.choices(FLIGHT_NUMBER_LETTERS, k=2))}{rng.randint(100, 999)}"
 
-def choose_airline():
-    # Example airlines
-    airlines = ['Phantom', 'DreamSky Airlines', 'VirtualJet', 'Enchanted Air', 'AeroFiction']
-    return random.choice(airlines)
+def choose_airline(rng=random):
+    return rng.choice(AIRLINES)
 
-def calculate_times(origin, destination, flight_date):
+def calculate_times(origin, destination, flight_date, rng=random):
     # Randomly generate departure time between 0 and 23 hours
-    departure_hour = random.randint(0, 23)
-    departure_minute = random.randint(0, 59)
+    departure_hour = rng.randint(0, 23)
+    departure_minute = rng.randint(0, 59)
     # Use flight_date instead of datetime.now()
     departure_time = datetime.combine(flight_date, datetime.min.time()).replace(hour=departure_hour, minute=departure_minute)
 
     # Random duration for the flight between 30 mins to 10 hours
-    duration = timedelta(minutes=random.randint(30, 600))
+    duration = timedelta(minutes=rng.randint(30, 600))
     arrival_time = departure_time + duration
 
     # Extracting the arrival date
@@ -37,49 +74,331 @@ def calculate_times(origin, destination, flight_date):
 
     return departure_time, arrival_time, arrival_date
 
-def generate_flights(flight_input, num_flights, db: Session):
-    flights = []
-    
+def iter_flight_rows(flight_input, num_flights, rng=random):
+    """
+    Lazily generates `num_flights` random flights for the route and date in `flight_input`.
+
+    Parameters:
+    - rng (random.Random, optional): Random generator to sample from, for reproducible output.
+      Default is the global `random` module.
+
+    Yields:
+    One dictionary of Flight column values per flight, ready for a bulk insert.
+    """
     for _ in range(num_flights):
-        flight_number = generate_flight_number()
-        airline = choose_airline()
-        departure_time, arrival_time, arrival_date= calculate_times(flight_input.origin, flight_input.destination, flight_input.departure_date)
-        
-        open_seats_economy = random.randint(0, 200)  
-        open_seats_business = random.randint(0, 50)
-        open_seats_first_class = random.randint(0, 20)
-
-        economy_seat_cost = random.randint(50, 500)  
-        business_seat_cost = random.randint(500, 1500)
-        first_class_cost = random.randint(1500, 3000)
-
-        new_flight = Flight(
-            flight_number =             flight_number,
-            airline =                   airline,
-            origin =                    flight_input.origin,
-            destination =               flight_input.destination,
-            
-            departure_date =            flight_input.departure_date,
-            arrival_date =              arrival_date,
-            departure_time =            departure_time,
-            arrival_time =              arrival_time,
-            
-            open_seats_economy =        open_seats_economy,
-            open_seats_business =       open_seats_business,
-            open_seats_first_class =    open_seats_first_class,
-            economy_seat_cost =         economy_seat_cost,
-            business_seat_cost =        business_seat_cost,
-            first_class_cost =          first_class_cost
-        )
+        departure_time, arrival_time, arrival_date = calculate_times(flight_input.origin, flight_input.destination, flight_input.departure_date, rng)
+
+        yield {
+            "flight_number":            generate_flight_number(rng),
+            "airline":                  choose_airline(rng),
+            "origin":                   flight_input.origin,
+            "destination":              flight_input.destination,
+
+            "departure_date":           flight_input.departure_date,
+            "arrival_date":             arrival_date,
+            "departure_time":           departure_time,
+            "arrival_time":             arrival_time,
+
+            "open_seats_economy":       rng.randint(0, 200),
+            "open_seats_business":      rng.randint(0, 50),
+            "open_seats_first_class":   rng.randint(0, 20),
+            "economy_seat_cost":        rng.randint(50, 500),
+            "business_seat_cost":       rng.randint(500, 1500),
+            "first_class_cost":         rng.randint(1500, 3000)
+        }
+
+def sample_flight_rows(flight_input, num_flights, rng=None):
+    """
+    Generates `num_flights` random flights at once using NumPy instead of per-flight `random` calls.
+
+    The value ranges match `iter_flight_rows`: departures at any minute of the day, durations between
+    30 minutes and 10 hours, and the same seat and price ranges per cabin.
+
+    Parameters:
+    - flight_input: The route and departure date of the flights.
+    - num_flights (int): The number of flights to generate.
+    - rng (numpy.random.Generator, optional): Random generator to sample from, for reproducible output.
+
+    Returns:
+    A list of dictionaries of Flight column values.
+    """
+    # Imported here, so only vectorized generation pays for loading NumPy
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("NumPy is required for vectorized flight generation.")
+
+    rng = rng if rng is not None else np.random.default_rng()
+    letters = np.array(list(FLIGHT_NUMBER_LETTERS))
+
+    flight_numbers = np.char.add(
+        np.char.add(letters[rng.integers(0, 26, num_flights)], letters[rng.integers(0, 26, num_flights)]),
+        rng.integers(100, 1000, num_flights).astype(str)
+    )
+    airlines = np.array(AIRLINES)[rng.integers(0, len(AIRLINES), num_flights)]
+
+    day_start = np.datetime64(flight_input.departure_date, 'm')
+    departure_times = day_start + rng.integers(0, 24 * 60, num_flights).astype('timedelta64[m]')
+    arrival_times = departure_times + rng.integers(30, 601, num_flights).astype('timedelta64[m]')
+
+    columns = {
+        "flight_number":            flight_numbers.tolist(),
+        "airline":                  airlines.tolist(),
+        "departure_time":           departure_times.tolist(),
+        "arrival_time":             arrival_times.tolist(),
+        "arrival_date":             arrival_times.astype('datetime64[D]').tolist(),
+        "open_seats_economy":       rng.integers(0, 201, num_flights).tolist(),
+        "open_seats_business":      rng.integers(0, 51, num_flights).tolist(),
+        "open_seats_first_class":   rng.integers(0, 21, num_flights).tolist(),
+        "economy_seat_cost":        rng.integers(50, 501, num_flights).tolist(),
+        "business_seat_cost":       rng.integers(500, 1501, num_flights).tolist(),
+        "first_class_cost":         rng.integers(1500, 3001, num_flights).tolist()
+    }
+    route = {
+        "origin":                   flight_input.origin,
+        "destination":              flight_input.destination,
+        "departure_date":           flight_input.departure_date
+    }
+
+    names = list(columns)
+    return [dict(route, **dict(zip(names, values))) for values in zip(*columns.values())]
+
+def iter_flight_chunks(flight_input, num_flights, chunk_size=1000, vectorized=False, seed=None):
+    """
+    Generates flights in chunks of at most `chunk_size` rows, so only one chunk is held in memory
+    at a time no matter how large `num_flights` is.
 
-        db.add(new_flight)
+    With a `seed`, every chunk is drawn from one generator seeded with it, so the same arguments
+    always produce the same flights.
+
+    Yields:
+    Lists of dictionaries of Flight column values.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+
+    if vectorized:
+        try:
+            import numpy as np
+        except ImportError:
+            raise RuntimeError("NumPy is required for vectorized flight generation.")
+
+        rng = np.random.default_rng(seed)
+        for start in range(0, num_flights, chunk_size):
+            yield sample_flight_rows(flight_input, min(chunk_size, num_flights - start), rng)
+        return
+
+    rows = iter_flight_rows(flight_input, num_flights, random.Random(seed) if seed is not None else random)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+@instrumented("generate_flights")
+def generate_flights(flight_input, num_flights, db: Session, chunk_size: int = 1000, vectorized: bool = False, seed: Optional[int] = None):
+    """
+    Generates random flights for a route and departure date and stores them in the database.
+
+    Flights are built in memory one chunk at a time and written with a single multi-row INSERT per
+    chunk. All chunks are written in one transaction, so either every flight is stored or none are.
+
+    Parameters:
+    - flight_input: The origin, destination and departure date of the flights.
+    - num_flights (int): The number of flights to generate.
+    - db (Session): The database session used to store the flights.
+    - chunk_size (int, optional): The number of flights built and inserted per statement (default is 1000).
+    - vectorized (bool, optional): Sample the random values with NumPy instead of `random` (default is False).
+    - seed (int, optional): Seed for the random values, so the same call always generates the same flights.
+
+    Returns:
+    A list with the flight_id of every created flight, in generation order.
+    """
+    flight_ids = []
+    # Earliest and latest departure of every chunk, to invalidate cached searches covering them
+    departure_bounds = []
+    # New flights are only kept for the in-memory views when one is loaded
+    view_flights = [] if flight_views_loaded(db.bind) else None
+    # Core insert on the table skips ORM bulk-insert bookkeeping, which is measurable at this volume
+    flights_table = Flight.__table__
+    statement = insert(flights_table).returning(flights_table.c.flight_id, sort_by_parameter_order=True)
+
+    try:
+        for chunk in iter_flight_chunks(flight_input, num_flights, chunk_size, vectorized, seed):
+            chunk_ids = db.scalars(statement, chunk).all()
+            flight_ids.extend(chunk_ids)
+
+            if view_flights is not None:
+                view_flights.extend(dict(row, flight_id=flight_id) for flight_id, row in zip(chunk_ids, chunk))
+
+            chunk_departures = [row["departure_time"] for row in chunk]
+            departure_bounds.extend((min(chunk_departures), max(chunk_departures)))
         db.commit()
-        db.refresh(new_flight)
-        logging.info(f"Successfully added flight: {new_flight.flight_number}")
-        
-    return flights
+    except Exception:
+        db.rollback()
+        raise
+
+    if flight_ids:
+        search_cache.invalidate(flight_input.origin, flight_input.destination, min(departure_bounds), max(departure_bounds))
+        if view_flights:
+            update_flight_views(db.bind, view_flights)
+
+    logger.info(f"Successfully added {len(flight_ids)} flights from {flight_input.origin} to {flight_input.destination} on {flight_input.departure_date}")
+
+    return flight_ids
+
+def build_flight_search_filters(criteria):
+    """
+    Builds the list of SQLAlchemy filter clauses for a flight search.
+
+    The route (origin/destination) equality filters come first, followed by the departure_time
+    range, so every search can be answered by a seek on the ix_flights_route_* indexes.
+
+    Parameters:
+    - criteria: An object containing the search criteria (see FlightSearchCriteria).
+
+    Returns:
+    A list of filter clauses to pass to `Query.filter` or `Select.where`.
+
+    Raises:
+    - ValueError: If an arrival date is provided but cannot be parsed.
+    """
+    departure_datetime = datetime.combine(criteria.departure_date, time.min)
+
+    # Start building the query with basic filters
+    filters = [
+        Flight.origin == criteria.origin,
+        Flight.destination == criteria.destination,
+        Flight.departure_time >= departure_datetime
+    ]
+
+    # Additional handling for arrival date if it's provided
+    if criteria.arrival_date:
+        arrival_date = parse_date(criteria.arrival_date)
+        arrival_datetime = datetime.combine(arrival_date, time.max)
+        filters.append(Flight.departure_time <= arrival_datetime)
 
-def handle_flight_search(criteria, db: Session, page: Optional[int] = 1, page_size: Optional[int] = 10):
+    # Flight Extra Filters
+    if criteria.flight_number:
+        filters.append(Flight.flight_number == criteria.flight_number)
+    if criteria.airline:
+        filters.append(Flight.airline == criteria.airline)
+    if criteria.departure_time and criteria.arrival_time:
+        filters.append(Flight.departure_time.between(criteria.departure_time, criteria.arrival_time))
+    if criteria.seat_type in SEAT_COLUMNS:
+        # Only bound the cost on the sides that were given
+        _, cost_column = SEAT_COLUMNS[criteria.seat_type]
+        if criteria.min_cost is not None:
+            filters.append(cost_column >= criteria.min_cost)
+        if criteria.max_cost is not None:
+            filters.append(cost_column <= criteria.max_cost)
+
+    return filters
+
+def encode_search_cursor(departure_time: datetime, flight_id: int) -> str:
+    """
+    Encodes the position of the last flight on a page as an opaque, URL safe cursor.
+    """
+    payload = json.dumps([departure_time.isoformat(), flight_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def decode_search_cursor(cursor: str):
+    """
+    Decodes a cursor created by `encode_search_cursor`.
+
+    Returns:
+    A (departure_time, flight_id) tuple.
+
+    Raises:
+    - ValueError: If the cursor is malformed.
+    """
+    try:
+        departure_time, flight_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(departure_time), int(flight_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError("Invalid search cursor.") from e
+
+def build_cursor_seek_filters(last_departure_time: datetime, last_flight_id: int):
+    """
+    Builds the keyset filters selecting the flights ordered after (last_departure_time, last_flight_id).
+
+    The plain >= bound is redundant with the OR clause but keeps the seek a range scan on the
+    route/time index.
+    """
+    return [
+        Flight.departure_time >= last_departure_time,
+        or_(
+            Flight.departure_time > last_departure_time,
+            and_(Flight.departure_time == last_departure_time, Flight.flight_id > last_flight_id)
+        )
+    ]
+
+def search_flights_by_cursor(query, page_size: int, cursor: Optional[str] = None, include_total: bool = False):
+    """
+    Fetches one page of an ordered flight search query using keyset pagination.
+
+    Parameters:
+    - query: A query of FLIGHT_COLUMNS ordered by (departure_time, flight_id).
+    - page_size (int): The number of records per page.
+    - cursor (Optional[str]): The cursor returned with the previous page, or None for the first page.
+    - include_total (bool): Whether to also count all matches and report total_pages.
+
+    Returns:
+    A dictionary containing the number of query results, a list of flight dicts, the page size,
+    the cursor of the next page (None on the last page) and, if requested, the total number of pages.
+    """
+    result = {}
+
+    if include_total:
+        total_count = query.order_by(None).count()
+        result["total_pages"] = (total_count + page_size - 1) // page_size
+
+    page_query = query
+    if cursor:
+        try:
+            last_departure_time, last_flight_id = decode_search_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+        page_query = page_query.filter(*build_cursor_seek_filters(last_departure_time, last_flight_id))
+
+    # Fetch one extra row to learn whether another page exists without counting
+    flights = page_query.limit(page_size + 1).all()
+    has_next_page = len(flights) > page_size
+    flights = flights[:page_size]
+
+    flight_rows = [flight._asdict() for flight in flights]
+    record_rows_returned(len(flight_rows))
+
+    result.update({
+        "query_results": len(flight_rows),
+        "flights": flight_rows,
+        "page_size": page_size,
+        "next_cursor": encode_search_cursor(flights[-1].departure_time, flights[-1].flight_id) if has_next_page else None
+    })
+
+    if not flight_rows and not cursor:
+        result["message"] = "There were no flights found for the search criteria."
+
+    return result
+
+# Upper bound on the page size the search endpoints accept, so a single request cannot pull a whole route
+MAX_SEARCH_PAGE_SIZE = 100
+
+def check_search_paging(page: int, page_size: int):
+    """
+    Rejects page numbers and page sizes below 1, which the offset and cursor queries cannot serve.
+
+    The endpoints also cap page_size at MAX_SEARCH_PAGE_SIZE through their query parameters.
+    In-process callers such as the benchmarks may ask for larger pages.
+    """
+    if page < 1:
+        raise HTTPException(400, "page must be at least 1")
+    if page_size < 1:
+        raise HTTPException(400, "page_size must be at least 1")
+
+@instrumented("handle_flight_search")
+def handle_flight_search(criteria, db: Session, page: Optional[int] = 1, page_size: Optional[int] = 10, cursor: Optional[str] = None, pagination: str = "offset", include_total: Optional[bool] = None, use_cache: bool = True):
     """
     Handles the search for flights based on various criteria. The function applies filters for
     origin, destination, departure date, and optionally arrival date, flight number, airline, 
@@ -92,66 +411,83 @@ def handle_flight_search(criteria, db: Session, page: Optional[int] = 1, page_si
     - db (Session): The database session used to execute the query.
     - page (Optional[int]): The page number for pagination, default is 1.
     - page_size (Optional[int]): The number of records per page for pagination, default is 10.
+    - cursor (Optional[str]): The `next_cursor` of a previous cursor-mode page. Implies cursor pagination.
+    - pagination (str): "offset" (default) for page numbers or "cursor" for keyset pagination.
+    - include_total (Optional[bool]): Whether to count all matches to report total_pages. Defaults to
+      True in offset mode and False in cursor mode.
+    - use_cache (bool): Whether to serve and store the result in the search cache, default is True.
 
     The function first builds a query with basic filters such as origin, destination, and departure date. 
     Additional filters for arrival date, flight number, airline, time range, and seat type with cost 
     constraints are applied if provided in the criteria. The function handles parsing of date and time 
-    strings and validates them. In case of invalid arrival date format, it logs an error and returns 
+    strings and validates them. In case of invalid arrival date format, it logs an error and raises 
     an HTTP exception. 
 
     The function also handles pagination, calculating the total number of matching records and total pages.
     It checks if the requested page exceeds the total number of available pages and handles this scenario 
     by returning an appropriate message. Finally, it fetches the flights based on the applied filters and 
-    pagination, converts the SQLAlchemy models to Pydantic models, and returns the search results.
+    pagination as plain column rows, converts them to dictionaries with the FlightModel fields, and returns
+    the search results.
+
+    In cursor mode results are ordered by (departure_time, flight_id) and each page seeks past the
+    last row of the previous one on the route/time index instead of skipping rows with OFFSET, so
+    deep pages cost the same as the first. The count query is skipped unless include_total is set.
+
+    Results are cached in `search_cache`, keyed on the normalized criteria and pagination parameters.
+    Generating flights or booking seats invalidates the cached searches covering the flights written,
+    so cached seat availability is never stale. Cached results are shared, treat them as read-only.
 
     Returns:
-    A dictionary containing the number of query results, a list of flight models, the current page, and 
-    total number of pages.
+    A dictionary containing the number of query results, a list of flight dicts, the current page, and 
+    total number of pages. In cursor mode the page number is replaced by `next_cursor`, which is None
+    on the last page, and total_pages is only present when include_total is set.
     """
-    query = db.query(Flight)
-    
-    departure_datetime = datetime.combine(criteria.departure_date, time.min)
+    if not use_cache:
+        return query_flight_search(criteria, db, page, page_size, cursor, pagination, include_total)
 
-    # Start building the query with basic filters
-    query = query.filter(
-        Flight.origin == criteria.origin,
-        Flight.destination == criteria.destination
-    )
+    cache_key = search_cache_key(database_scope(db.get_bind()), criteria, page, page_size, cursor, pagination, include_total)
+    cached_result = search_cache.get(cache_key)
+    if cached_result is not None:
+        return cached_result
 
-    # Additional handling for departure date
-    query = query.filter(Flight.departure_time >= departure_datetime)
+    route_version = search_cache.route_version(criteria.origin, criteria.destination)
+    result = query_flight_search(criteria, db, page, page_size, cursor, pagination, include_total)
 
-    # Additional handling for arrival date if it's provided
-    if criteria.arrival_date:
-        try:
-            arrival_date = parse(criteria.arrival_date).date()
-            arrival_datetime = datetime.combine(arrival_date, time.max)
-            query = query.filter(Flight.departure_time <= arrival_datetime)
-        except ValueError:
-            logging.error("Arrival date present but invalid as data type")
-            return HTTPException(500, "Arrival date present but invalid as data type")
+    if isinstance(result, dict):
+        search_cache.put(cache_key, result, criteria.origin, criteria.destination, *search_window(criteria), route_version)
 
-    # Flight Extra Filters
-    if criteria.flight_number:
-        query = query.filter(Flight.flight_number == criteria.flight_number)
-    if criteria.airline:
-        query = query.filter(Flight.airline == criteria.airline)
-    if criteria.departure_time and criteria.arrival_time:
-        query = query.filter(Flight.departure_time.between(criteria.departure_time, criteria.arrival_time))
-    if criteria.seat_type:
-        min_cost = int(criteria.min_cost) if criteria.min_cost is not None else 0
-        max_cost = int(criteria.max_cost) if criteria.max_cost is not None else float('inf')
+    return result
+
+def query_flight_search(criteria, db: Session, page: Optional[int] = 1, page_size: Optional[int] = 10, cursor: Optional[str] = None, pagination: str = "offset", include_total: Optional[bool] = None):
+    """
+    Runs a flight search against the database, bypassing the search cache. See `handle_flight_search`.
+    """
+    try:
+        filters = build_flight_search_filters(criteria)
+    except ValueError:
+        logging.error("Arrival date present but invalid as data type")
+        raise HTTPException(500, "Arrival date present but invalid as data type")
+
+    check_search_paging(page, page_size)
 
-        if criteria.seat_type == 'economy':
-            query = query.filter(Flight.economy_seat_cost.between(min_cost, max_cost))
-        elif criteria.seat_type == 'business':
-            query = query.filter(Flight.business_seat_cost.between(min_cost, max_cost))
-        elif criteria.seat_type == 'first_class':
-            query = query.filter(Flight.first_class_cost.between(min_cost, max_cost))
+    # Select the columns only: building an ORM object per row costs more than the query itself
+    query = db.query(*FLIGHT_COLUMNS).filter(*filters).order_by(Flight.departure_time, Flight.flight_id)
 
-        # Calculate the total count of matching records
+    if cursor or pagination == "cursor":
+        return search_flights_by_cursor(query, page_size, cursor, bool(include_total))
 
-        # Calculate the total count of matching records
+    # Offset pagination without a total can still serve the page, it just cannot report total_pages
+    if include_total is False:
+        flights = query.offset((page - 1) * page_size).limit(page_size).all()
+        flight_rows = [flight._asdict() for flight in flights]
+        record_rows_returned(len(flight_rows))
+        return {
+            "query_results": len(flight_rows),
+            "flights": flight_rows,
+            "page": page
+        }
+
+    # Calculate the total count of matching records
     total_count = query.count()
 
     # If no flights are found, return immediately
@@ -179,17 +515,109 @@ def handle_flight_search(criteria, db: Session, page: Optional[int] = 1, page_si
     offset = (page - 1) * page_size
     flights = query.offset(offset).limit(page_size).all()
 
-    # Convert SQLAlchemy models to Pydantic models
-    flight_models = [FlightModel.from_orm(flight) for flight in flights]
+    # Rows are plain column tuples from our own table, so they are returned as dicts without
+    # building ORM objects or validating them into Pydantic models
+    flight_rows = [flight._asdict() for flight in flights]
+    record_rows_returned(len(flight_rows))
 
     # Return the query results
     return {
-        "query_results": len(flight_models),
-        "flights": flight_models,
+        "query_results": len(flight_rows),
+        "flights": flight_rows,
         "page": page,
         "total_pages": total_pages
     }
 
+# Columns every compact search row starts with, followed by the cost columns (see handle_compact_flight_search)
+COMPACT_FLIGHT_COLUMNS = (Flight.flight_id, Flight.flight_number, Flight.airline, Flight.departure_time, Flight.arrival_time)
+COMPACT_FLIGHT_FIELDS = ["flight_id", "flight_number", "airline", "departure", "arrival"]
+
+def compact_time(value: datetime) -> str:
+    # Minute precision is all a traveller reads, and shorter than a full ISO timestamp
+    return value.strftime("%Y-%m-%dT%H:%M")
+
+@instrumented("handle_compact_flight_search")
+def handle_compact_flight_search(criteria: CompactSearchCriteria, db: Session, use_cache: bool = True):
+    """
+    Searches for flights like `handle_flight_search`, returning a small ranked table meant to be
+    passed to a language model instead of full flight rows.
+
+    Rows hold the flight id, number, airline and departure and arrival time, then the cost and open
+    seats of the requested seat type, or only the cost of each cabin when no seat type is given.
+    Column names are listed once instead of repeated per row. With a seat type, flights without an
+    open seat in it are left out. Results are ranked in SQL, by departure ("earliest") or by cost in
+    the requested cabin, economy by default ("cheapest"), and cached like searches.
+
+    Without an arrival date only flights departing on the departure date are searched, so the
+    cheapest flights are the cheapest of that day rather than of every later departure.
+
+    Parameters:
+    - criteria (CompactSearchCriteria): The search criteria, the ranking and the number of rows to return.
+    - db (Session): SQLAlchemy database session for executing queries.
+    - use_cache (bool): Whether to serve and store the result in the search cache, default is True.
+
+    Returns:
+    A dictionary with the number of rows, the ranking, the column names and the rows. Includes
+    `more` when further flights match, and a message when none do.
+    """
+    cache_key = search_cache_key(database_scope(db.get_bind()), criteria, "compact")
+    if use_cache:
+        cached_result = search_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+    route_version = search_cache.route_version(criteria.origin, criteria.destination)
+
+    try:
+        filters = build_flight_search_filters(criteria)
+    except ValueError:
+        logging.error("Arrival date present but invalid as data type")
+        raise HTTPException(500, "Arrival date present but invalid as data type")
+
+    window_start, window_end = search_window(criteria)
+    if not criteria.arrival_date:
+        window_end = window_start + timedelta(days=1)
+        filters.append(Flight.departure_time < window_end)
+
+    columns = list(COMPACT_FLIGHT_COLUMNS)
+    fields = list(COMPACT_FLIGHT_FIELDS)
+
+    if criteria.seat_type in SEAT_COLUMNS:
+        seats_column, cost_column = SEAT_COLUMNS[criteria.seat_type]
+        filters.append(seats_column > 0)
+        columns += [cost_column, seats_column]
+        fields += ["cost", "open_seats"]
+    else:
+        columns += [cost for _, cost in SEAT_COLUMNS.values()]
+        fields += [f"{seat_type}_cost" for seat_type in SEAT_COLUMNS]
+
+    order_by = [Flight.departure_time, Flight.flight_id]
+    if criteria.rank_by == "cheapest":
+        _, rank_column = SEAT_COLUMNS.get(criteria.seat_type, SEAT_COLUMNS["economy"])
+        order_by.insert(0, rank_column)
+
+    # One extra row tells whether more flights match without counting them
+    rows = db.execute(select(*columns).where(*filters).order_by(*order_by).limit(criteria.limit + 1)).all()
+    more = len(rows) > criteria.limit
+    rows = rows[:criteria.limit]
+    record_rows_returned(len(rows))
+
+    result = {
+        "query_results": len(rows),
+        "ranked_by": criteria.rank_by,
+        "columns": fields,
+        "rows": [[flight_id, number, airline, compact_time(departure), compact_time(arrival), *costs] for flight_id, number, airline, departure, arrival, *costs in rows]
+    }
+    if more:
+        result["more"] = True
+    if not rows:
+        result["message"] = "There were no flights found for the search criteria."
+
+    if use_cache:
+        search_cache.put(cache_key, result, criteria.origin, criteria.destination, window_start, window_end, route_version)
+
+    return result
+
+@instrumented("handle_flight_book")
 def handle_flight_book(flight_id: int, seat_type: str, num_seats: int = 1, db: Session = Depends(get_db)):
     """
     Books a specified number of seats on a flight.
@@ -209,79 +637,484 @@ def handle_flight_book(flight_id: int, seat_type: str, num_seats: int = 1, db: S
     - On successful booking: A dictionary containing a success message and flight information.
     - On failure (flight not found or not enough seats): A failure message as a string.
 
-    The function checks seat availability before booking. If the requested number of seats is 
+    The function checks seat availability and decrements it in a single conditional UPDATE, so
+    concurrent bookings of the same flight can never oversell it. If the requested number of seats is 
     not available in the specified class, it returns an error message. If the flight is not found, 
     it returns a 'Flight not found.' message.
     """
-    # Retrieve the flight from the database
-    flight = db.query(Flight).filter(Flight.flight_id == flight_id).first()
-
-    if not flight:
-        return "Flight not found."
-
-    # Initialize the cost variable
-    total_cost = 0
-
-    # Check seat availability based on seat type and number of requested seats
-    if seat_type == "economy" and flight.open_seats_economy >= num_seats:
-        flight.open_seats_economy -= num_seats
-        total_cost = flight.economy_seat_cost * num_seats
-    elif seat_type == "business" and flight.open_seats_business >= num_seats:
-        flight.open_seats_business -= num_seats
-        total_cost = flight.business_seat_cost * num_seats
-    elif seat_type == "first_class" and flight.open_seats_first_class >= num_seats:
-        flight.open_seats_first_class -= num_seats
-        total_cost = flight.first_class_cost * num_seats
-    else:
+    if num_seats < 1:
+        return "Number of seats must be at least 1."
+
+    if seat_type not in SEAT_COLUMNS:
+        return f"Not enough {seat_type} seats available."
+
+    seats_column, cost_column = SEAT_COLUMNS[seat_type]
+
+    # Check and decrement in one statement, so concurrent bookings can never both pass the check
+    result = db.execute(
+        update(Flight)
+        .where(Flight.flight_id == flight_id, seats_column >= num_seats)
+        .values({seats_column: seats_column - num_seats})
+        .execution_options(synchronize_session=False)
+    )
+
+    if result.rowcount == 0:
+        flight_exists = db.query(Flight.flight_id).filter(Flight.flight_id == flight_id).first() is not None
+        db.rollback()
+
+        if not flight_exists:
+            return "Flight not found."
+
         # If not enough seats are available, return a failure message
         return f"Not enough {seat_type} seats available."
 
     # Commit the booking to the database
     db.commit()
-    
+
+    flight = db.get(Flight, flight_id, populate_existing=True)
+    search_cache.invalidate(flight.origin, flight.destination, flight.departure_time)
+    update_flight_views(db.bind, [flight])
+    total_cost = getattr(flight, cost_column.key) * num_seats
+
     success_message = f"Successfully booked {num_seats} {seat_type} seat(s) on {flight.airline} flight on {flight.departure_date} from {flight.origin} to {flight.destination}. Total cost: ${total_cost}."
 
     # Return a success message
     return {"message": success_message, "flight_info": flight}
 
-def search_flights(**params):
+# Upper bound on legs per batch booking, well below SQLite's limit on bound parameters per statement
+MAX_BATCH_BOOKING_LEGS = 500
+
+def aggregate_booking_legs(legs: List[BookingLeg]):
+    """
+    Sums the requested seats per flight and seat type, so a flight that appears in several legs is
+    checked against its combined demand.
+
+    Returns:
+    - A dictionary of seat type to {flight_id: num_seats}, or a failure message as a string if a
+      leg is invalid.
+    """
+    demand = {}
+
+    for leg in legs:
+        if leg.num_seats < 1:
+            return "Number of seats must be at least 1."
+
+        if leg.seat_type not in SEAT_COLUMNS:
+            return f"Not enough {leg.seat_type} seats available."
+
+        seats_by_flight = demand.setdefault(leg.seat_type, {})
+        seats_by_flight[leg.flight_id] = seats_by_flight.get(leg.flight_id, 0) + leg.num_seats
+
+    return demand
+
+def build_batch_booking_update(demand):
+    """
+    Builds a single conditional UPDATE decrementing every requested seat count.
+
+    Each seat column is decremented by a CASE over flight_id, and a flight only matches when every
+    one of its columns still has enough open seats, so the statement updates exactly the flights
+    that can be fully booked. Updated rows are returned, which saves loading them separately.
     """
-    Sends a GET request to a FastAPI endpoint to search for flights based on various criteria.
+    flight_ids = set()
+    seat_checks = []
+    new_values = {}
+
+    for seat_type, seats_by_flight in demand.items():
+        seats_column, _ = SEAT_COLUMNS[seat_type]
+        requested_seats = case(seats_by_flight, value=Flight.flight_id, else_=0)
+
+        flight_ids.update(seats_by_flight)
+        seat_checks.append(seats_column >= requested_seats)
+        new_values[seats_column] = seats_column - requested_seats
+
+    return (
+        update(Flight)
+        .where(Flight.flight_id.in_(flight_ids), *seat_checks)
+        .values(new_values)
+        .returning(*FLIGHT_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ), flight_ids
+
+def describe_batch_booking_failure(demand, flights_by_id):
+    """
+    Returns the failure message for the first leg that could not be booked, given the current
+    rows of the requested flights.
+    """
+    for seat_type, seats_by_flight in demand.items():
+        seats_column, _ = SEAT_COLUMNS[seat_type]
+
+        for flight_id, num_seats in seats_by_flight.items():
+            flight = flights_by_id.get(flight_id)
+            if flight is None:
+                return f"Flight {flight_id} not found."
+
+            if flight[seats_column.key] < num_seats:
+                return f"Not enough {seat_type} seats available on flight {flight_id}."
+
+    # Every leg fits now, so seats were released while the update ran
+    return "Seat availability changed during booking, please retry."
+
+@instrumented("handle_batch_booking")
+def handle_batch_booking(legs: List[BookingLeg], db: Session):
+    """
+    Books several legs, each a number of seats of one type on one flight, as a single all or
+    nothing transaction.
+
+    All seat counts are checked and decremented by one conditional UPDATE, so the cost of a batch
+    does not grow with one round trip per leg, and concurrent bookings can never oversell a flight.
+    If any leg cannot be booked, nothing is booked.
 
     Parameters:
-    - criteria (FlightSearchCriteria): An object containing the search criteria.
+    - legs (List[BookingLeg]): The flights, seat types and seat counts to book.
+    - db (Session): SQLAlchemy database session for executing queries.
 
     Returns:
-    The response from the FastAPI endpoint as a JSON object.
+    - On successful booking: A dictionary with a summary message, the total cost and a cost breakdown per leg.
+    - On failure (invalid leg, flight not found or not enough seats): A failure message as a string.
     """
-    # Create an instance of FlightSearchCriteria from the passed arguments
-    criteria = FlightSearchCriteria(**params)
-    
-    # Constructing the URL with query parameters
-    url = f"http://127.0.0.1:8000/search-flights/?origin={criteria.origin}&destination={criteria.destination}&departure_date={criteria.departure_date}"
+    if not legs:
+        return "At least one leg is required."
 
-    # Adding optional parameters to the URL
-    if criteria.arrival_date:
-        url += f"&arrival_date={criteria.arrival_date}"
-    if criteria.flight_number:
-        url += f"&flight_number={criteria.flight_number}"
-    if criteria.airline:
-        url += f"&airline={criteria.airline}"
-    if criteria.departure_time:
-        url += f"&departure_time={criteria.departure_time}"
-    if criteria.arrival_time:
-        url += f"&arrival_time={criteria.arrival_time}"
-    if criteria.seat_type:
-        url += f"&seat_type={criteria.seat_type}"
-    if criteria.min_cost is not None:
-        url += f"&min_cost={criteria.min_cost}"
-    if criteria.max_cost is not None:
-        url += f"&max_cost={criteria.max_cost}"
-
-    url += "&page=1&page_size=10"
-
-    # Making the GET request
-    response = requests.get(url, headers={'accept': 'application/json'})
-
-    # Returning the JSON response
-    return response.json()
+    if len(legs) > MAX_BATCH_BOOKING_LEGS:
+        return f"A batch booking can have at most {MAX_BATCH_BOOKING_LEGS} legs."
+
+    demand = aggregate_booking_legs(legs)
+    if isinstance(demand, str):
+        return demand
+
+    statement, flight_ids = build_batch_booking_update(demand)
+
+    try:
+        flights_by_id = {row.flight_id: row._mapping for row in db.execute(statement)}
+
+        if len(flights_by_id) < len(flight_ids):
+            db.rollback()
+            current_rows = db.execute(select(*FLIGHT_COLUMNS).where(Flight.flight_id.in_(flight_ids))).mappings()
+            return describe_batch_booking_failure(demand, {row["flight_id"]: row for row in current_rows})
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    for flight in flights_by_id.values():
+        search_cache.invalidate(flight["origin"], flight["destination"], flight["departure_time"])
+    update_flight_views(db.bind, flights_by_id.values())
+
+    leg_costs = []
+    for leg in legs:
+        flight = flights_by_id[leg.flight_id]
+        _, cost_column = SEAT_COLUMNS[leg.seat_type]
+        seat_cost = flight[cost_column.key]
+
+        leg_costs.append({
+            "flight_id": leg.flight_id,
+            "flight_number": flight["flight_number"],
+            "airline": flight["airline"],
+            "origin": flight["origin"],
+            "destination": flight["destination"],
+            "departure_time": flight["departure_time"],
+            "seat_type": leg.seat_type,
+            "num_seats": leg.num_seats,
+            "seat_cost": seat_cost,
+            "total_cost": seat_cost * leg.num_seats
+        })
+
+    total_seats = sum(leg.num_seats for leg in legs)
+    total_cost = sum(leg_cost["total_cost"] for leg_cost in leg_costs)
+
+    return {
+        "message": f"Successfully booked {total_seats} seat(s) across {len(legs)} leg(s). Total cost: ${total_cost}.",
+        "total_cost": total_cost,
+        "legs": leg_costs
+    }
+
+# Number of rows fetched from the database and serialized per chunk when streaming exports
+EXPORT_CHUNK_SIZE = 1000
+
+def iter_flight_row_chunks(session_factory, filters=(), chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Streams flight rows from the database in chunks, ordered by flight_id.
+
+    The query runs with `yield_per`, so rows are fetched from a server side cursor and only one
+    chunk is in memory at a time. The generator opens and closes its own session: a response
+    streamed after the request handler returned cannot rely on the request's session.
+
+    Parameters:
+    - session_factory: Callable returning a new database session, e.g. models.SessionLocal.
+    - filters: Filter clauses to apply, e.g. from `build_flight_search_filters`.
+    - chunk_size (int): The number of rows per chunk.
+
+    Yields:
+    Lists of row mappings keyed by column name.
+    """
+    columns = Flight.__table__.columns
+    statement = select(*columns).where(*filters).order_by(Flight.flight_id).execution_options(yield_per=chunk_size)
+
+    with session_factory() as db:
+        for partition in db.execute(statement).mappings().partitions():
+            yield partition
+
+def export_json_default(value):
+    # Same ISO format pydantic uses for dates and datetimes in API responses
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def stream_flights_ndjson(row_chunks):
+    """
+    Serializes row chunks as newline delimited JSON, one flight object per line.
+    """
+    for chunk in row_chunks:
+        yield "".join(json.dumps(dict(row), default=export_json_default) + "\n" for row in chunk).encode()
+
+def stream_flights_json_array(row_chunks):
+    """
+    Serializes row chunks as a single JSON array, without ever holding the whole array in memory.
+    """
+    separator = "["
+    for chunk in row_chunks:
+        if chunk:
+            yield (separator + ",".join(json.dumps(dict(row), default=export_json_default) for row in chunk)).encode()
+            separator = ","
+    yield b"[]" if separator == "[" else b"]"
+
+def stream_flights_csv(row_chunks):
+    """
+    Serializes row chunks as CSV with a header row.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(Flight.__table__.columns.keys())
+
+    for chunk in row_chunks:
+        writer.writerows(row.values() for row in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+@instrumented("handle_itinerary_search")
+def handle_itinerary_search(criteria: ItinerarySearchCriteria, db: Session):
+    """
+    Searches for direct and connecting itineraries between two airports.
+
+    The search walks the in-memory route graph (see services.route_graph) instead of joining the
+    flights table with itself, following only connections that depart within the layover window
+    after the previous leg arrives.
+
+    Parameters:
+    - criteria (ItinerarySearchCriteria): Route, departure date, stop and layover limits, seat
+      requirements, sort order and the number of itineraries to return.
+    - db (Session): SQLAlchemy database session, used to load the route graph on first use.
+
+    Returns:
+    A dictionary containing the number of itineraries and the itineraries, each with its number of
+    stops, departure and arrival time, duration, total cost per seat and legs. Includes a message
+    when nothing was found, and `truncated` when the search stopped at its work limit.
+    """
+    if criteria.min_layover_minutes > criteria.max_layover_minutes:
+        raise HTTPException(400, "min_layover_minutes cannot exceed max_layover_minutes")
+
+    itineraries, truncated = get_route_graph(db).find_itineraries(
+        criteria.origin,
+        criteria.destination,
+        criteria.departure_date,
+        max_stops=criteria.max_stops,
+        min_layover=timedelta(minutes=criteria.min_layover_minutes),
+        max_layover=timedelta(minutes=criteria.max_layover_minutes),
+        seat_type=criteria.seat_type,
+        num_seats=criteria.num_seats,
+        limit=criteria.limit,
+        sort_by=criteria.sort_by
+    )
+
+    _, cost_column = SEAT_COLUMNS[criteria.seat_type or "economy"]
+    record_rows_returned(sum(len(legs) for legs in itineraries))
+
+    if criteria.compact:
+        return compact_itineraries(itineraries, cost_column.key, truncated)
+
+    results = []
+
+    for legs in itineraries:
+        results.append({
+            "stops": len(legs) - 1,
+            "departure_time": legs[0].departure_time,
+            "arrival_time": legs[-1].arrival_time,
+            "duration_minutes": int((legs[-1].arrival_time - legs[0].departure_time).total_seconds() // 60),
+            "total_cost": sum(getattr(leg, cost_column.key) for leg in legs),
+            "legs": [leg._asdict() for leg in legs]
+        })
+
+    result = {"query_results": len(results), "itineraries": results}
+    if not results:
+        result["message"] = "There were no itineraries found for the search criteria."
+    if truncated:
+        result["truncated"] = True
+
+    return result
+
+# Fields of a compact itinerary row
+COMPACT_ITINERARY_FIELDS = ["stops", "departure", "arrival", "duration_minutes", "total_cost", "flight_ids", "via"]
+
+def compact_itineraries(itineraries, cost_field: str, truncated: bool = False):
+    """
+    Lays itineraries out as a table like `handle_compact_flight_search`: one row per itinerary with
+    its flight ids and connecting airports instead of full legs. Flights are booked by id, so the
+    ids are all a model needs to act on an itinerary.
+    """
+    rows = [
+        [
+            len(legs) - 1,
+            compact_time(legs[0].departure_time),
+            compact_time(legs[-1].arrival_time),
+            int((legs[-1].arrival_time - legs[0].departure_time).total_seconds() // 60),
+            sum(getattr(leg, cost_field) for leg in legs),
+            [leg.flight_id for leg in legs],
+            [leg.destination for leg in legs[:-1]]
+        ]
+        for legs in itineraries
+    ]
+
+    result = {"query_results": len(rows), "columns": COMPACT_ITINERARY_FIELDS, "itineraries": rows}
+    if not rows:
+        result["message"] = "There were no itineraries found for the search criteria."
+    if truncated:
+        result["truncated"] = True
+
+    return result
+
+def build_fare_calendar_query(origin: str, destination: str, window_start: datetime, window_end: datetime):
+    """
+    Builds the GROUP BY query behind the fare calendar: per departure date, the number of flights and
+    per cabin the minimum and average cost and the total open seats.
+    """
+    aggregates = [func.count().label("flights")]
+    for seat_type, (seats_column, cost_column) in SEAT_COLUMNS.items():
+        aggregates.extend([
+            func.min(cost_column).label(f"{seat_type}_min_cost"),
+            func.avg(cost_column).label(f"{seat_type}_avg_cost"),
+            func.sum(seats_column).label(f"{seat_type}_open_seats")
+        ])
+
+    # Filtering on departure_time rather than departure_date lets the route index bound the scan
+    return (
+        select(Flight.departure_date, *aggregates)
+        .where(Flight.origin == origin, Flight.destination == destination, Flight.departure_time.between(window_start, window_end))
+        .group_by(Flight.departure_date)
+        .order_by(Flight.departure_date)
+    )
+
+# Longest date window a fare calendar covers in one call
+FARE_CALENDAR_MAX_DAYS = 366
+
+@instrumented("handle_fare_calendar")
+def handle_fare_calendar(criteria: FareCalendarCriteria, db: Session, use_cache: bool = True):
+    """
+    Summarizes the flights on a route per departure day over a date window.
+
+    All days are computed by one GROUP BY query over the route/departure index, so a month of
+    fares costs one query instead of a search per date. Results are cached like searches and
+    invalidated when flights on the route in the window are generated or booked.
+
+    Parameters:
+    - criteria (FareCalendarCriteria): Route and date window; the window defaults to 30 days.
+    - db (Session): SQLAlchemy database session for executing queries.
+    - use_cache (bool): Whether to serve and store the result in the search cache, default is True.
+
+    Returns:
+    A dictionary with the route, the window and one entry per day that has flights: the date, the
+    number of flights and, per cabin, the minimum and average cost and the total open seats.
+    """
+    start_date = criteria.start_date
+    end_date = criteria.end_date or start_date + timedelta(days=30)
+
+    if end_date < start_date:
+        raise HTTPException(400, "end_date cannot be before start_date")
+    if (end_date - start_date).days >= FARE_CALENDAR_MAX_DAYS:
+        raise HTTPException(400, f"The date window can cover at most {FARE_CALENDAR_MAX_DAYS} days")
+
+    window_start = datetime.combine(start_date, time.min)
+    window_end = datetime.combine(end_date, time.max)
+
+    cache_key = search_cache_key(database_scope(db.get_bind()), criteria, "fare-calendar", end_date)
+    if use_cache:
+        cached_result = search_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+    route_version = search_cache.route_version(criteria.origin, criteria.destination)
+
+    days = []
+    for row in db.execute(build_fare_calendar_query(criteria.origin, criteria.destination, window_start, window_end)).mappings():
+        day = {"date": row["departure_date"], "flights": row["flights"]}
+        for seat_type in SEAT_COLUMNS:
+            day[seat_type] = {
+                "min_cost": row[f"{seat_type}_min_cost"],
+                # AVG comes back as a Decimal on some databases
+                "avg_cost": round(float(row[f"{seat_type}_avg_cost"]), 2),
+                "open_seats": row[f"{seat_type}_open_seats"]
+            }
+        days.append(day)
+
+    record_rows_returned(len(days))
+
+    result = {
+        "origin": criteria.origin,
+        "destination": criteria.destination,
+        "start_date": start_date,
+        "end_date": end_date,
+        "days": days
+    }
+
+    if use_cache:
+        search_cache.put(cache_key, result, criteria.origin, criteria.destination, window_start, window_end, route_version)
+
+    return result
+
+@instrumented("handle_cheapest_fares")
+def handle_cheapest_fares(criteria: FareSearchCriteria, db: Session):
+    """
+    Finds the cheapest flights on a route in a cabin between two dates, using the fare snapshot.
+
+    Parameters:
+    - criteria (FareSearchCriteria): Route, date range, cabin, required open seats and the number of flights to return.
+    - db (Session): SQLAlchemy database session, used to load the snapshot and the flights found.
+
+    Returns:
+    A dictionary containing the number of flights found and the flights, cheapest first.
+    """
+    end_date = criteria.end_date or criteria.start_date
+    cheapest = get_fare_snapshot(db).cheapest(criteria.origin, criteria.destination, criteria.seat_type, criteria.start_date, end_date, criteria.limit, criteria.num_seats)
+
+    # The snapshot ranks the flights, their current rows come from the database by primary key
+    flight_ids = [flight_id for flight_id, _ in cheapest]
+    flights_by_id = {row.flight_id: row._asdict() for row in db.execute(select(*FLIGHT_COLUMNS).where(Flight.flight_id.in_(flight_ids)))}
+    flight_rows = [flights_by_id[flight_id] for flight_id in flight_ids if flight_id in flights_by_id]
+    record_rows_returned(len(flight_rows))
+
+    result = {"query_results": len(flight_rows), "flights": flight_rows}
+    if not flight_rows:
+        result["message"] = "There were no flights found for the search criteria."
+
+    return result
+
+@instrumented("handle_daily_fares")
+def handle_daily_fares(criteria: FareSearchCriteria, db: Session):
+    """
+    Summarizes the fares on a route in a cabin per departure day between two dates, using the fare snapshot.
+
+    Parameters:
+    - criteria (FareSearchCriteria): Route, date range, cabin and required open seats.
+    - db (Session): SQLAlchemy database session, used to load the snapshot on first use.
+
+    Returns:
+    A dictionary with one entry per day that has available flights: the date, the number of flights
+    and their minimum and median cost.
+    """
+    end_date = criteria.end_date or criteria.start_date
+    days = get_fare_snapshot(db).daily_fares(criteria.origin, criteria.destination, criteria.seat_type, criteria.start_date, end_date, criteria.num_seats)
+
+    return {"seat_type": criteria.seat_type, "days": days}
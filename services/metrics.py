@@ -0,0 +1,202 @@
+import asyncio
+import contextvars
+import cProfile
+import functools
+import io
+import pstats
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds, from sub-millisecond SQL statements up to slow bulk generation
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Buckets for per-request counts such as SQL statements or rows returned
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250, 1000, 10000)
+
+class Histogram:
+    """
+    Cumulative histogram in the Prometheus exposition format, with one series per label set.
+    """
+
+    def __init__(self, name: str, help: str, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+
+            bucket_counts = series[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    bucket_counts[index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+
+        with self._lock:
+            for label_values, (bucket_counts, total, count) in sorted(self._series.items()):
+                labels = [f'{name}="{escape_label(value)}"' for name, value in zip(self.label_names, label_values)]
+
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f"{self.name}_bucket{format_labels(labels, bound)} {bucket_count}")
+                lines.append(f"{self.name}_bucket{format_labels(labels, '+Inf')} {count}")
+
+                lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+
+        return lines
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(labels, bucket_bound=None) -> str:
+    if bucket_bound is not None:
+        labels = labels + [f'le="{bucket_bound}"']
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+REQUEST_DURATION = Histogram("flights_http_request_duration_seconds", "HTTP request latency by endpoint.", ("method", "path", "status"))
+REQUEST_SQL_DURATION = Histogram("flights_http_request_sql_duration_seconds", "Time spent executing SQL per HTTP request.", ("method", "path"))
+REQUEST_SQL_STATEMENTS = Histogram("flights_http_request_sql_statements", "SQL statements executed per HTTP request.", ("method", "path"), COUNT_BUCKETS)
+REQUEST_ROWS_RETURNED = Histogram("flights_http_request_rows_returned", "Flight rows returned per HTTP request.", ("method", "path"), COUNT_BUCKETS)
+SQL_STATEMENT_DURATION = Histogram("flights_sql_statement_duration_seconds", "Latency of individual SQL statements.")
+SERVICE_DURATION = Histogram("flights_service_duration_seconds", "Latency of instrumented flight_manager functions.", ("function",))
+
+HISTOGRAMS = [REQUEST_DURATION, REQUEST_SQL_DURATION, REQUEST_SQL_STATEMENTS, REQUEST_ROWS_RETURNED, SQL_STATEMENT_DURATION, SERVICE_DURATION]
+
+# Extra metric sources, called on every scrape. Each returns (name, type, help, value) tuples.
+_collectors = []
+
+def register_collector(collector):
+    _collectors.append(collector)
+
+def render_prometheus() -> str:
+    """
+    Renders every metric in the Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+
+    for collector in _collectors:
+        for name, metric_type, help, value in collector():
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {metric_type}", f"{name} {value}"])
+
+    return "\n".join(lines) + "\n"
+
+def profile_report(profiler: cProfile.Profile, limit: int = 40) -> str:
+    """
+    Formats a request profile as pstats text, hottest functions by cumulative time first.
+
+    Only `@instrumented` calls are profiled, so endpoints without one have an empty profile.
+    """
+    profiler.create_stats()
+    if not profiler.stats:
+        return "No profiled calls: this endpoint runs no instrumented service function.\n"
+
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+class RequestStats:
+    """
+    Per-request counters, filled in by the SQL event hooks and the service instrumentation.
+    """
+
+    __slots__ = ("sql_time", "sql_statements", "rows_returned", "profiler")
+
+    def __init__(self, profiler: Optional[cProfile.Profile] = None):
+        self.sql_time = 0.0
+        self.sql_statements = 0
+        self.rows_returned = 0
+        self.profiler = profiler
+
+# The stats object of the request being handled. Context variables are copied into the threadpool
+# that runs sync endpoints, and the object itself is shared, so updates from there are visible.
+current_request_stats = contextvars.ContextVar("current_request_stats", default=None)
+
+def record_rows_returned(count: int):
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.rows_returned += count
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    SQL_STATEMENT_DURATION.observe(elapsed)
+
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.sql_time += elapsed
+        stats.sql_statements += 1
+
+_sql_instrumented = False
+
+def instrument_sql():
+    """
+    Times every SQL statement of every engine, including the async engine's sync core.
+    """
+    global _sql_instrumented
+
+    if not _sql_instrumented:
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+        _sql_instrumented = True
+
+def instrumented(name: str):
+    """
+    Decorator recording the latency of a service function in SERVICE_DURATION.
+
+    When the current request asked for a profile, the function also runs under the request's
+    cProfile profiler. It is enabled here rather than in the middleware because sync endpoints run
+    in a worker thread, and cProfile only sees the thread it was enabled in. Profiles of async
+    functions also include whatever else the event loop runs while they await.
+    """
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                stats = current_request_stats.get()
+                profiler = stats.profiler if stats is not None else None
+                started = time.perf_counter()
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+                    SERVICE_DURATION.observe(time.perf_counter() - started, name)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            stats = current_request_stats.get()
+            profiler = stats.profiler if stats is not None else None
+            started = time.perf_counter()
+            if profiler is not None:
+                profiler.enable()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                SERVICE_DURATION.observe(time.perf_counter() - started, name)
+
+        return wrapper
+
+    return decorator
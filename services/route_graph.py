@@ -0,0 +1,273 @@
+import heapq
+import os
+import threading
+import time as clock
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from collections.abc import Mapping
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+
+from models import Flight
+from services.search_cache import database_scope
+
+# How long a loaded graph is trusted before it is rebuilt from the database. Writes made through
+# this process update the graph immediately, so this only bounds staleness from other processes.
+ROUTE_GRAPH_MAX_AGE_SECONDS = float(os.getenv("ROUTE_GRAPH_MAX_AGE_SECONDS", "300"))
+
+# Upper bound on the leg combinations examined by one search, so hub airports with thousands of
+# departures a day cannot turn a request into an unbounded walk
+ITINERARY_SEARCH_BUDGET = 1000000
+
+# Flight columns in table order, so `_asdict()` gives the same keys as search results
+GraphFlight = namedtuple("GraphFlight", [column.key for column in Flight.__table__.columns])
+
+# Open seat and seat cost fields per seat type, as in flight_manager.SEAT_COLUMNS
+SEAT_FIELDS = {
+    "economy": ("open_seats_economy", "economy_seat_cost"),
+    "business": ("open_seats_business", "business_seat_cost"),
+    "first_class": ("open_seats_first_class", "first_class_cost")
+}
+
+# Routes that receive more flights than this at once are re-sorted instead of inserted into one by one
+BULK_INSERT_THRESHOLD = 64
+
+def to_graph_flight(flight) -> GraphFlight:
+    """
+    Converts a Flight object, a row mapping or a dictionary of column values into a GraphFlight.
+    """
+    if isinstance(flight, Mapping):
+        return GraphFlight(*(flight[field] for field in GraphFlight._fields))
+    return GraphFlight(*(getattr(flight, field) for field in GraphFlight._fields))
+
+class RouteGraph:
+    """
+    In-memory graph of every flight, for connecting itinerary searches.
+
+    Departures are kept per route (origin, destination), sorted by departure time, so all flights on
+    a route within a time window are found by two binary searches. Each airport also knows the
+    airports it has routes to and from, which prunes connections that cannot reach the destination.
+
+    Seat counts are copied from the database when flights are loaded or written through this process.
+    They are advisory: bookings always re-check availability in the database.
+    """
+
+    def __init__(self, flights=()):
+        self._routes = {}
+        self._destinations = defaultdict(set)
+        self._origins = defaultdict(set)
+        self._lock = threading.Lock()
+        self.built_at = clock.monotonic()
+        self.upsert(flights)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(flights) for _, flights in self._routes.values())
+
+    def upsert(self, flights):
+        """
+        Adds new flights to the graph, or replaces the stored copy of flights it already holds.
+        """
+        flights_by_route = defaultdict(list)
+        for flight in flights:
+            flights_by_route[(flight.origin, flight.destination)].append(flight)
+
+        with self._lock:
+            for route, route_flights in flights_by_route.items():
+                if route not in self._routes:
+                    self._routes[route] = ([], [])
+                    self._destinations[route[0]].add(route[1])
+                    self._origins[route[1]].add(route[0])
+
+                departure_times, departures = self._routes[route]
+                new_flights = [flight for flight in route_flights if not self._replace(departure_times, departures, flight)]
+
+                if len(new_flights) > BULK_INSERT_THRESHOLD:
+                    departures.extend(new_flights)
+                    departures.sort(key=lambda flight: (flight.departure_time, flight.flight_id))
+                    departure_times[:] = [flight.departure_time for flight in departures]
+                else:
+                    for flight in new_flights:
+                        index = bisect_right(departure_times, flight.departure_time)
+                        departure_times.insert(index, flight.departure_time)
+                        departures.insert(index, flight)
+
+    @staticmethod
+    def _replace(departure_times, departures, flight) -> bool:
+        index = bisect_left(departure_times, flight.departure_time)
+        while index < len(departures) and departure_times[index] == flight.departure_time:
+            if departures[index].flight_id == flight.flight_id:
+                departures[index] = flight
+                return True
+            index += 1
+        return False
+
+    def _departures(self, origin, destination, earliest, latest, seats_field, num_seats):
+        """
+        Returns the flights on a route departing in [earliest, latest] with enough open seats.
+        """
+        route = self._routes.get((origin, destination))
+        if route is None:
+            return []
+
+        departure_times, departures = route
+        window = departures[bisect_left(departure_times, earliest):bisect_right(departure_times, latest)]
+
+        if seats_field is None:
+            return window
+        return [flight for flight in window if getattr(flight, seats_field) >= num_seats]
+
+    def _any_departures(self, origin, destination, earliest, latest=None) -> bool:
+        """
+        Whether a route has any departure in [earliest, latest] (latest None means open ended).
+        """
+        route = self._routes.get((origin, destination))
+        if route is None:
+            return False
+
+        departure_times = route[0]
+        index = bisect_left(departure_times, earliest)
+        return index < len(departure_times) and (latest is None or departure_times[index] <= latest)
+
+    def _iter_itineraries(self, origin, destination, departure_date, max_stops, min_layover, max_layover, seats_field, num_seats, budget):
+        day_start = datetime.combine(departure_date, time.min)
+        day_end = datetime.combine(departure_date, time.max)
+
+        def connections(leg, next_destination):
+            budget[0] -= 1
+            return self._departures(leg.destination, next_destination, leg.arrival_time + min_layover, leg.arrival_time + max_layover, seats_field, num_seats)
+
+        for flight in self._departures(origin, destination, day_start, day_end, seats_field, num_seats):
+            yield (flight,)
+
+        if max_stops < 1:
+            return
+
+        # Only airports with a route on to the destination can be the last stop
+        last_stops = self._origins.get(destination, set()) - {origin, destination}
+
+        for first_stop in self._destinations.get(origin, set()) - {origin, destination}:
+            second_stops = self._destinations.get(first_stop, set()) & (last_stops - {first_stop}) if max_stops >= 2 else set()
+            if first_stop not in last_stops and not second_stops:
+                continue
+
+            first_legs = self._departures(origin, first_stop, day_start, day_end, seats_field, num_seats)
+            if not first_legs:
+                continue
+
+            # Every connection departs within the layover window of some first leg arrival. Routes
+            # with no departure in the combined window are skipped without looking at each leg.
+            earliest_connection = min(leg.arrival_time for leg in first_legs) + min_layover
+            latest_connection = max(leg.arrival_time for leg in first_legs) + max_layover
+
+            if first_stop in last_stops and self._any_departures(first_stop, destination, earliest_connection, latest_connection):
+                for first_leg in first_legs:
+                    if budget[0] <= 0:
+                        return
+                    for second_leg in connections(first_leg, destination):
+                        yield (first_leg, second_leg)
+
+            for second_stop in second_stops:
+                if not self._any_departures(first_stop, second_stop, earliest_connection, latest_connection):
+                    continue
+                if not self._any_departures(second_stop, destination, earliest_connection + min_layover):
+                    continue
+
+                for first_leg in first_legs:
+                    for second_leg in connections(first_leg, second_stop):
+                        if budget[0] <= 0:
+                            return
+                        for third_leg in connections(second_leg, destination):
+                            yield (first_leg, second_leg, third_leg)
+
+    def find_itineraries(self, origin: str, destination: str, departure_date: date, max_stops: int = 1, min_layover: timedelta = timedelta(minutes=45), max_layover: timedelta = timedelta(hours=6), seat_type: Optional[str] = None, num_seats: int = 1, limit: int = 10, sort_by: str = "arrival"):
+        """
+        Finds the best itineraries of up to `max_stops` stops leaving `origin` on `departure_date`.
+
+        Parameters:
+        - origin, destination (str): Airport codes of the trip.
+        - departure_date (date): The date the first leg departs.
+        - max_stops (int): The maximum number of connections, 0 to 2.
+        - min_layover, max_layover (timedelta): Allowed time between arriving and the next departure.
+        - seat_type (str, optional): Only use flights with `num_seats` open seats of this type, and price
+          itineraries by it (economy when not given).
+        - limit (int): The number of itineraries to return.
+        - sort_by (str): "arrival" (earliest arrival), "duration" (shortest trip) or "price" (cheapest).
+
+        Returns:
+        A tuple of the best itineraries, each a tuple of GraphFlight legs, and whether the search
+        stopped early because it reached ITINERARY_SEARCH_BUDGET.
+        """
+        seats_field, cost_field = SEAT_FIELDS[seat_type] if seat_type else (None, SEAT_FIELDS["economy"][1])
+
+        def trip_duration(legs):
+            return legs[-1].arrival_time - legs[0].departure_time
+
+        def trip_cost(legs):
+            return sum(getattr(leg, cost_field) for leg in legs)
+
+        sort_keys = {
+            "arrival": lambda legs: (legs[-1].arrival_time, trip_duration(legs), len(legs)),
+            "duration": lambda legs: (trip_duration(legs), legs[-1].arrival_time, len(legs)),
+            "price": lambda legs: (trip_cost(legs), legs[-1].arrival_time, len(legs))
+        }
+
+        budget = [ITINERARY_SEARCH_BUDGET]
+        with self._lock:
+            itineraries = heapq.nsmallest(
+                limit,
+                self._iter_itineraries(origin, destination, departure_date, max_stops, min_layover, max_layover, seats_field, num_seats, budget),
+                key=sort_keys[sort_by]
+            )
+
+        return itineraries, budget[0] <= 0
+
+# One graph per database, loaded on first use
+_route_graphs = {}
+_route_graphs_lock = threading.Lock()
+
+def load_route_graph(db) -> RouteGraph:
+    """
+    Builds a route graph from every flight in the database.
+    """
+    rows = db.execute(select(*Flight.__table__.columns)).all()
+    return RouteGraph(GraphFlight(*row) for row in rows)
+
+def get_route_graph(db) -> RouteGraph:
+    """
+    Returns the route graph of the session's database, loading it on first use and rebuilding it
+    once it is older than ROUTE_GRAPH_MAX_AGE_SECONDS.
+    """
+    scope = database_scope(db.bind)
+
+    with _route_graphs_lock:
+        graph = _route_graphs.get(scope)
+        if graph is None or clock.monotonic() - graph.built_at > ROUTE_GRAPH_MAX_AGE_SECONDS:
+            graph = _route_graphs[scope] = load_route_graph(db)
+
+    return graph
+
+def loaded_route_graph(bind) -> Optional[RouteGraph]:
+    """
+    Returns the route graph of the database behind `bind` if it has been loaded, else None.
+    """
+    return _route_graphs.get(database_scope(bind))
+
+def update_route_graph(bind, flights):
+    """
+    Applies committed flight writes to the database's route graph, if it is loaded. Graphs that
+    are not loaded yet will read the writes from the database when they are.
+
+    Parameters:
+    - bind: The engine or connection the flights were written through.
+    - flights: Flight objects, row mappings or dictionaries of column values including flight_id.
+    """
+    graph = loaded_route_graph(bind)
+    if graph is not None:
+        graph.upsert(to_graph_flight(flight) for flight in flights)
+
+def clear_route_graphs():
+    with _route_graphs_lock:
+        _route_graphs.clear()
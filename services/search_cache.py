@@ -0,0 +1,184 @@
+import os
+import threading
+import time as clock
+from collections import OrderedDict
+from datetime import date, datetime, time
+from typing import Optional
+
+# Cache sizing, configurable like the database pool settings in models.py. Each worker process has
+# its own cache and only sees its own writes, and the number of workers cannot be told reliably from
+# inside one, so entries expire after 1 second by default to bound how stale seat counts get. A
+# single-process deployment can raise SEARCH_CACHE_TTL_SECONDS, where invalidation alone keeps it exact.
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "1"))
+
+class SearchCache:
+    """
+    Bounded LRU cache with a TTL for flight search results.
+
+    Every entry remembers the route and departure window its search covered. Writes invalidate
+    only the entries whose window contains the departure times they touched, so a booking on one
+    route/date leaves every other cached search in place.
+
+    Invalidation is exact for writes made through this process. Writes made by other processes
+    sharing the database are only picked up when entries expire, so the TTL bounds that staleness.
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES, ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._route_versions = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def route_version(self, origin: str, destination: str) -> int:
+        """
+        Returns the write version of a route. Read it before running a search and pass it to `put`,
+        so a result computed while the route was being written is never cached.
+        """
+        with self._lock:
+            return self._route_versions.get((origin, destination), 0)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, _, _, _ = entry
+            if expires_at <= clock.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, origin: str, destination: str, window_start: datetime, window_end: Optional[datetime], version: int):
+        """
+        Caches a search result for the route and departure window [window_start, window_end]
+        (window_end None means open ended), unless the route was written since `version` was read.
+        """
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            if self._route_versions.get((origin, destination), 0) != version:
+                return
+
+            self._entries[key] = (value, clock.monotonic() + self.ttl_seconds, (origin, destination), window_start, window_end)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, origin: str, destination: str, earliest: datetime, latest: Optional[datetime] = None):
+        """
+        Drops every cached search on the route whose departure window overlaps [earliest, latest].
+        """
+        latest = latest or earliest
+
+        with self._lock:
+            route = (origin, destination)
+            self._route_versions[route] = self._route_versions.get(route, 0) + 1
+
+            stale_keys = [
+                key for key, (_, _, entry_route, window_start, window_end) in self._entries.items()
+                if entry_route == route and window_start <= latest and (window_end is None or earliest <= window_end)
+            ]
+            for key in stale_keys:
+                del self._entries[key]
+
+            self.invalidations += len(stale_keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._route_versions.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+    def prometheus_samples(self):
+        """
+        Returns the cache counters as (name, type, help, value) tuples for the /metrics endpoint.
+        """
+        stats = self.stats()
+        return [
+            ("flights_search_cache_entries", "gauge", "Entries in the search cache.", stats["size"]),
+            ("flights_search_cache_hits_total", "counter", "Search cache hits.", stats["hits"]),
+            ("flights_search_cache_misses_total", "counter", "Search cache misses.", stats["misses"]),
+            ("flights_search_cache_evictions_total", "counter", "Entries evicted to stay within the size limit.", stats["evictions"]),
+            ("flights_search_cache_expirations_total", "counter", "Entries dropped after their TTL.", stats["expirations"]),
+            ("flights_search_cache_invalidations_total", "counter", "Entries dropped because flights they cover were written.", stats["invalidations"])
+        ]
+
+# Process wide cache used by the search handlers
+search_cache = SearchCache()
+
+def database_scope(bind) -> str:
+    """
+    Identifies the database behind an engine independently of its driver, so the sync and async
+    engines for the same database share cache entries.
+    """
+    url = bind.url
+    return url.set(drivername=url.get_backend_name()).render_as_string()
+
+def search_cache_key(scope: str, criteria, *page_params):
+    """
+    Builds the cache key for a search from the database scope, the normalized criteria and the
+    pagination parameters.
+    """
+    return (scope, tuple(sorted(criteria.model_dump().items())), page_params)
+
+def parse_date(value: str) -> date:
+    """
+    Parses a date given as text. ISO dates (YYYY-MM-DD), which is what the API and the chat agent
+    send, are read directly; anything else falls back to dateutil, imported only when needed.
+
+    Raises:
+    - ValueError: If the value is not a recognizable date.
+    """
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        from dateutil.parser import parse
+        return parse(value).date()
+
+def search_window(criteria):
+    """
+    Returns the (start, end) departure window a search covers. The end is None when no arrival
+    date bounds the search.
+    """
+    window_start = datetime.combine(criteria.departure_date, time.min)
+    window_end = None
+
+    if criteria.arrival_date:
+        try:
+            window_end = datetime.combine(parse_date(criteria.arrival_date), time.max)
+        except ValueError:
+            pass
+
+    return window_start, window_end
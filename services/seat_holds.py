@@ -0,0 +1,321 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.orm import Session
+
+from models import Flight, SeatHold
+from services.flight_manager import FLIGHT_COLUMNS, SEAT_COLUMNS, update_flight_views
+from services.metrics import instrumented
+from services.search_cache import search_cache
+
+# Create a logger for this module
+logger = logging.getLogger(__name__)
+
+# How long held seats stay reserved when the caller does not say, and the longest hold allowed
+HOLD_TTL_SECONDS = float(os.getenv("HOLD_TTL_SECONDS", "600"))
+MAX_HOLD_TTL_SECONDS = float(os.getenv("MAX_HOLD_TTL_SECONDS", "3600"))
+# How often the reaper releases expired holds (0 disables it), and how many it releases per transaction
+HOLD_REAPER_INTERVAL_SECONDS = float(os.getenv("HOLD_REAPER_INTERVAL_SECONDS", "5"))
+HOLD_REAPER_BATCH_SIZE = int(os.getenv("HOLD_REAPER_BATCH_SIZE", "500"))
+
+def utc_now() -> datetime:
+    # Naive UTC, like the other DateTime columns
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def build_seat_release_update(released):
+    """
+    Builds a single UPDATE giving seats back to their flights, with a CASE over flight_id per seat
+    column like `build_batch_booking_update`. Updated rows are returned.
+
+    Parameters:
+    - released: A dictionary of seat type to {flight_id: num_seats}.
+    """
+    flight_ids = set()
+    new_values = {}
+
+    for seat_type, seats_by_flight in released.items():
+        seats_column, _ = SEAT_COLUMNS[seat_type]
+        flight_ids.update(seats_by_flight)
+        new_values[seats_column] = seats_column + case(seats_by_flight, value=Flight.flight_id, else_=0)
+
+    return (
+        update(Flight)
+        .where(Flight.flight_id.in_(flight_ids))
+        .values(new_values)
+        .returning(*FLIGHT_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+def publish_flight_changes(db: Session, flights):
+    """
+    Drops the cached searches covering committed seat changes and applies them to the in-memory views.
+    """
+    flights = list(flights)
+    for flight in flights:
+        search_cache.invalidate(flight["origin"], flight["destination"], flight["departure_time"])
+    update_flight_views(db.bind, flights)
+
+def describe_hold(db: Session, hold_id: int, now: datetime) -> str:
+    """
+    Returns why a hold could not be confirmed or released, given its current row.
+    """
+    hold = db.execute(select(SeatHold.status, SeatHold.expires_at).where(SeatHold.hold_id == hold_id)).first()
+
+    if hold is None:
+        return "Hold not found."
+    if hold.status == "confirmed":
+        return "Hold already confirmed."
+    if hold.status == "released":
+        return "Hold already released."
+    if hold.status == "expired" or hold.expires_at <= now:
+        return "Hold expired, the seats are no longer reserved."
+
+    return "Hold changed during the request, please retry."
+
+@instrumented("handle_hold_seats")
+def handle_hold_seats(flight_id: int, seat_type: str, num_seats: int, db: Session, ttl_seconds: Optional[float] = None):
+    """
+    Reserves seats on a flight for a limited time, so they can be booked later with
+    `handle_confirm_hold` without being taken by someone else in the meantime.
+
+    The seats are taken from the flight's open seats by the same conditional UPDATE as a booking,
+    in the transaction that records the hold, so holds and bookings together can never oversell a
+    flight. Unless confirmed or released, the seats return to the flight after `ttl_seconds`, when
+    the reaper (see `reap_expired_holds`) expires the hold.
+
+    Parameters:
+    - flight_id (int): The unique identifier of the flight.
+    - seat_type (str): The class of the seats to hold (economy, business, or first_class).
+    - num_seats (int): The number of seats to hold.
+    - db (Session): SQLAlchemy database session for executing queries.
+    - ttl_seconds (float, optional): How long to hold the seats, default is HOLD_TTL_SECONDS.
+
+    Returns:
+    - On success: A dictionary with a message, the hold_id, the held seats, their total cost and the expiry time.
+    - On failure (invalid request, flight not found or not enough seats): A failure message as a string.
+    """
+    if num_seats < 1:
+        return "Number of seats must be at least 1."
+
+    if seat_type not in SEAT_COLUMNS:
+        return f"Not enough {seat_type} seats available."
+
+    ttl_seconds = HOLD_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    if not 0 < ttl_seconds <= MAX_HOLD_TTL_SECONDS:
+        return f"A hold can last between 0 and {MAX_HOLD_TTL_SECONDS:g} seconds."
+
+    seats_column, cost_column = SEAT_COLUMNS[seat_type]
+    now = utc_now()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    try:
+        flight = db.execute(
+            update(Flight)
+            .where(Flight.flight_id == flight_id, seats_column >= num_seats)
+            .values({seats_column: seats_column - num_seats})
+            .returning(*FLIGHT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        ).mappings().first()
+
+        if flight is None:
+            db.rollback()
+            if db.execute(select(Flight.flight_id).where(Flight.flight_id == flight_id)).first() is None:
+                return "Flight not found."
+            return f"Not enough {seat_type} seats available."
+
+        hold_id = db.execute(
+            insert(SeatHold)
+            .values(flight_id=flight_id, seat_type=seat_type, num_seats=num_seats, status="held", created_at=now, expires_at=expires_at)
+            .returning(SeatHold.hold_id)
+        ).scalar_one()
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    publish_flight_changes(db, [flight])
+
+    return {
+        "message": f"Held {num_seats} {seat_type} seat(s) on flight {flight_id} until {expires_at:%Y-%m-%d %H:%M:%S} UTC.",
+        "hold_id": hold_id,
+        "flight_id": flight_id,
+        "seat_type": seat_type,
+        "num_seats": num_seats,
+        "total_cost": flight[cost_column.key] * num_seats,
+        "expires_at": expires_at
+    }
+
+@instrumented("handle_confirm_hold")
+def handle_confirm_hold(hold_id: int, db: Session):
+    """
+    Turns an active hold into a booking. The seats were taken from the flight when they were
+    held, so confirming only marks the hold, and the flight's open seats do not change.
+
+    A hold is confirmed only while it is 'held' and unexpired, by one conditional UPDATE, so a
+    confirmation racing the reaper or a release either wins outright or fails with a message.
+
+    Parameters:
+    - hold_id (int): The hold returned by `handle_hold_seats`.
+    - db (Session): SQLAlchemy database session for executing queries.
+
+    Returns:
+    - On success: A dictionary containing a success message, the hold_id and flight information.
+    - On failure (hold not found, expired, released or already confirmed): A failure message as a string.
+    """
+    now = utc_now()
+
+    try:
+        hold = db.execute(
+            update(SeatHold)
+            .where(SeatHold.hold_id == hold_id, SeatHold.status == "held", SeatHold.expires_at > now)
+            .values(status="confirmed")
+            .returning(SeatHold.flight_id, SeatHold.seat_type, SeatHold.num_seats)
+            .execution_options(synchronize_session=False)
+        ).first()
+
+        if hold is None:
+            db.rollback()
+            return describe_hold(db, hold_id, now)
+
+        flight = db.execute(select(*FLIGHT_COLUMNS).where(Flight.flight_id == hold.flight_id)).mappings().one()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    _, cost_column = SEAT_COLUMNS[hold.seat_type]
+    total_cost = flight[cost_column.key] * hold.num_seats
+
+    success_message = f"Successfully booked {hold.num_seats} {hold.seat_type} seat(s) on {flight['airline']} flight on {flight['departure_date']} from {flight['origin']} to {flight['destination']}. Total cost: ${total_cost}."
+
+    return {"message": success_message, "hold_id": hold_id, "flight_info": dict(flight)}
+
+@instrumented("handle_release_hold")
+def handle_release_hold(hold_id: int, db: Session):
+    """
+    Cancels an active hold and gives its seats back to the flight.
+
+    Parameters:
+    - hold_id (int): The hold returned by `handle_hold_seats`.
+    - db (Session): SQLAlchemy database session for executing queries.
+
+    Returns:
+    - On success: A dictionary with a message and the hold_id.
+    - On failure (hold not found, expired, released or already confirmed): A failure message as a string.
+    """
+    now = utc_now()
+
+    try:
+        hold = db.execute(
+            update(SeatHold)
+            .where(SeatHold.hold_id == hold_id, SeatHold.status == "held")
+            .values(status="released")
+            .returning(SeatHold.flight_id, SeatHold.seat_type, SeatHold.num_seats)
+            .execution_options(synchronize_session=False)
+        ).first()
+
+        if hold is None:
+            db.rollback()
+            return describe_hold(db, hold_id, now)
+
+        flights = db.execute(build_seat_release_update({hold.seat_type: {hold.flight_id: hold.num_seats}})).mappings().all()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    publish_flight_changes(db, flights)
+
+    return {"message": f"Released {hold.num_seats} {hold.seat_type} seat(s) on flight {hold.flight_id}.", "hold_id": hold_id}
+
+def build_expired_holds_query(now: datetime, batch_size: int):
+    """
+    Selects the ids of up to `batch_size` held seats past their expiry, oldest first, from the
+    status/expiry index.
+    """
+    return (
+        select(SeatHold.hold_id)
+        .where(SeatHold.status == "held", SeatHold.expires_at <= now)
+        .order_by(SeatHold.expires_at)
+        .limit(batch_size)
+    )
+
+def release_expired_holds(db: Session, batch_size: int = HOLD_REAPER_BATCH_SIZE, now: Optional[datetime] = None) -> int:
+    """
+    Expires up to `batch_size` holds past their expiry, oldest first, and gives their seats back
+    in one transaction: one UPDATE marks the holds and returns them, and one UPDATE restores the
+    seats of every affected flight.
+
+    Holds are only expired while still 'held', so a hold confirmed or released concurrently is
+    never also expired, and several reapers (one per worker) can run at once.
+
+    Returns:
+    The number of holds expired.
+    """
+    now = now or utc_now()
+    expired_ids = build_expired_holds_query(now, batch_size)
+
+    try:
+        holds = db.execute(
+            update(SeatHold)
+            .where(SeatHold.hold_id.in_(expired_ids.scalar_subquery()), SeatHold.status == "held")
+            .values(status="expired")
+            .returning(SeatHold.flight_id, SeatHold.seat_type, SeatHold.num_seats)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        if not holds:
+            db.rollback()
+            return 0
+
+        released = {}
+        for hold in holds:
+            seats_by_flight = released.setdefault(hold.seat_type, {})
+            seats_by_flight[hold.flight_id] = seats_by_flight.get(hold.flight_id, 0) + hold.num_seats
+
+        flights = db.execute(build_seat_release_update(released)).mappings().all()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    publish_flight_changes(db, flights)
+
+    return len(holds)
+
+def reap_expired_holds(session_factory, batch_size: int = HOLD_REAPER_BATCH_SIZE) -> int:
+    """
+    Releases every expired hold, one batch per transaction so the write lock is held briefly.
+
+    Returns:
+    The number of holds expired.
+    """
+    total = 0
+    now = utc_now()
+
+    with session_factory() as db:
+        while True:
+            released = release_expired_holds(db, batch_size, now)
+            total += released
+            if released < batch_size:
+                return total
+
+async def run_hold_reaper(session_factory, interval: float = HOLD_REAPER_INTERVAL_SECONDS, batch_size: int = HOLD_REAPER_BATCH_SIZE):
+    """
+    Background task releasing expired holds every `interval` seconds, until cancelled. The
+    database work runs in a thread, so it does not block the event loop.
+    """
+    while True:
+        try:
+            released = await asyncio.to_thread(reap_expired_holds, session_factory, batch_size)
+            if released:
+                logger.info(f"Released {released} expired seat holds")
+        except Exception:
+            logger.exception("Releasing expired seat holds failed")
+
+        await asyncio.sleep(interval)
@@ -0,0 +1,102 @@
+import re
+import time
+from types import SimpleNamespace
+
+# "<origin> to <destination> on <YYYY-MM-DD>" in a user message becomes a flight search
+SEARCH_PATTERN = re.compile(r"\b([A-Z]{3}) to ([A-Z]{3}) on (\d{4}-\d{2}-\d{2})\b")
+# "book flight <id>" optionally followed by a seat type becomes a booking
+BOOK_PATTERN = re.compile(r"\bbook flight (\d+)(?: in (economy|business|first_class))?", re.IGNORECASE)
+
+def text_part(text: str):
+    return SimpleNamespace(text=text, function_call=None)
+
+def function_call_part(name: str, args: dict):
+    return SimpleNamespace(text="", function_call=SimpleNamespace(name=name, args=args))
+
+def response(parts):
+    # Same attribute path as a Vertex AI GenerationResponse: candidates[0].content.parts
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(role="model", parts=parts))])
+
+def describe_result(name: str, result: dict) -> str:
+    if "error" in result or "detail" in result:
+        return f"{name} failed: {result.get('error') or result.get('detail')}."
+    if "itineraries" in result:
+        return f"I found {len(result['itineraries'])} connecting itineraries."
+    if "rows" in result:
+        return f"I found {len(result['rows'])} flights."
+    message = result.get("message")
+    # A successful booking nests the confirmation text under message
+    return message["message"] if isinstance(message, dict) else f"{message}"
+
+class StubChatSession:
+    """
+    Chat session of `StubGenerativeModel`, answering like a Gemini chat session with function calling.
+
+    - A user message naming routes ("SEA to JFK on 2024-05-01") gets one `get_search_flights` call
+      per route in a single turn, and "book flight 12 in business" gets a `book_flight` call.
+    - Function results get a text summary of each result.
+    - Anything else gets a greeting.
+
+    Parameters:
+    - latency (float): Seconds before the first chunk of a response, like a model's time to first token.
+    - chunk_delay (float): Seconds between streamed chunks of text.
+    """
+
+    def __init__(self, latency: float = 0.0, chunk_delay: float = 0.0):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.history = []
+
+    def send_message(self, content, stream: bool = False):
+        self.history.append(content)
+        parts = self._answer(content)
+        self.history.append(parts)
+
+        if stream:
+            return self._stream(parts)
+
+        time.sleep(self.latency + self.chunk_delay * len(parts))
+        return response(parts)
+
+    def _stream(self, parts):
+        time.sleep(self.latency)
+        for index, part in enumerate(parts):
+            if index:
+                time.sleep(self.chunk_delay)
+            yield response([part])
+
+    def _answer(self, content):
+        if isinstance(content, list):
+            summary = " ".join(describe_result(part["name"], part["response"]) for part in content)
+            return [text_part(word) for word in re.findall(r"\S+\s*", summary)]
+
+        calls = [
+            function_call_part("get_search_flights", {"origin": origin, "destination": destination, "departure_date": departure_date})
+            for origin, destination, departure_date in SEARCH_PATTERN.findall(content)
+        ]
+        calls += [
+            function_call_part("book_flight", {"flight_id": int(flight_id), "seat_type": seat_type or "economy"})
+            for flight_id, seat_type in BOOK_PATTERN.findall(content)
+        ]
+        if calls:
+            return calls
+
+        greeting = "Hi, I'm ReX ✈️, your flight assistant. Ask me to search or book a flight."
+        return [text_part(word) for word in re.findall(r"\S+\s*", greeting)]
+
+class StubGenerativeModel:
+    """
+    Offline stand-in for a Vertex AI `GenerativeModel`, for running and benchmarking the chat agent
+    without credentials or network access. Select it with FLIGHT_AGENT_MODEL=stub.
+    """
+
+    def __init__(self, latency: float = 0.0, chunk_delay: float = 0.0):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+
+    def start_chat(self):
+        return StubChatSession(self.latency, self.chunk_delay)
+
+    @staticmethod
+    def function_response(name: str, response: dict):
+        return {"name": name, "response": response}
@@ -0,0 +1,333 @@
+import csv
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import Flight
+from services.fare_snapshot import clear_fare_snapshots
+from services.flight_manager import AIRLINES, FLIGHT_NUMBER_LETTERS
+from services.route_graph import clear_route_graphs
+from services.search_cache import search_cache
+
+# Create a logger for this module
+logger = logging.getLogger(__name__)
+
+# Airports schedules are generated over by default, busiest first
+DEFAULT_AIRPORTS = ("ATL", "DFW", "DEN", "ORD", "LAX", "JFK", "LAS", "MCO", "MIA", "CLT", "SEA", "PHX", "SFO", "IAH", "BOS")
+
+# Flights sampled per batch. Each batch has its own generator derived from the seed, so the output
+# depends on the seed, the number of flights and the batch size, and on nothing else.
+WORKLOAD_BATCH_SIZE = 100000
+
+# Relative share of departures per hour of the day: few at night, banks in the morning and evening
+DEPARTURE_HOUR_WEIGHTS = (1, 1, 1, 1, 1, 2, 6, 9, 9, 8, 7, 7, 7, 7, 7, 7, 8, 9, 9, 8, 6, 4, 3, 2)
+
+# Flight columns in table order, without the flight_id assigned by the database
+WORKLOAD_COLUMNS = tuple(column.key for column in Flight.__table__.columns if column.key != "flight_id")
+
+# Inclusive ranges of open seats and seat costs per cabin, the same as `iter_flight_rows`
+SEAT_RANGES = {
+    "open_seats_economy": (0, 200),
+    "open_seats_business": (0, 50),
+    "open_seats_first_class": (0, 20)
+}
+COST_RANGES = {
+    "economy_seat_cost": (50, 500),
+    "business_seat_cost": (500, 1500),
+    "first_class_cost": (1500, 3000)
+}
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("Workload generation requires NumPy, install it with `pip install numpy`")
+    return numpy
+
+# Plain driver INSERT of the generated columns, for `sqlite_rows`
+SQLITE_INSERT = f"INSERT INTO flights ({', '.join(WORKLOAD_COLUMNS)}) VALUES ({', '.join('?' * len(WORKLOAD_COLUMNS))})"
+
+def column_rows(columns):
+    """
+    Converts a column batch from `WorkloadGenerator.sample_batch` into dictionaries of Flight column values.
+    """
+    values = [column.tolist() for column in columns.values()]
+    return [dict(zip(WORKLOAD_COLUMNS, row)) for row in zip(*values)]
+
+def sqlite_rows(columns):
+    """
+    Converts a column batch into tuples for SQLITE_INSERT, with dates and datetimes formatted as
+    SQLAlchemy stores them in SQLite ("2024-01-01" and "2024-01-01 08:05:00.000000"), so they
+    compare correctly against the values it binds in queries.
+    """
+    np = require_numpy()
+    values = []
+
+    for column in columns.values():
+        if column.dtype == "datetime64[D]":
+            column = column.astype(str)
+        elif column.dtype.kind == "M":
+            column = np.char.replace(column.astype("datetime64[us]").astype(str), "T", " ")
+        values.append(column.tolist())
+
+    return list(zip(*values))
+
+class WorkloadGenerator:
+    """
+    Seedable generator of synthetic flight schedules across many routes and days.
+
+    Flights are sampled with NumPy in batches of `batch_size`, whole columns at a time, and can be
+    written to the database with one bulk INSERT per batch, or to CSV or Parquet files. With the
+    same seed and arguments every run produces exactly the same flights, so benchmark datasets are
+    identical from run to run.
+
+    Schedules are shaped like real ones rather than uniform noise: busier airports get more flights,
+    departures cluster in the morning and evening banks, every flight on a route takes about the same
+    time, and fares are higher on some routes than on others.
+
+    Parameters:
+    - seed (int, optional): Seed for every random value. Without one, fresh entropy is drawn and kept
+      in `seed`, so the run can be reproduced afterwards.
+    - airports: Airport codes, busiest first. Routes connect every pair of them.
+    - routes: (origin, destination) pairs to use instead of every pair of `airports`, all equally busy.
+    - start_date (date): The first departure date.
+    - days (int): The number of departure dates, starting at `start_date`.
+    - balanced (bool): Spread the flights evenly over every route and day instead of sampling them.
+    - batch_size (int): The number of flights sampled and written at a time.
+    """
+
+    def __init__(self, seed: Optional[int] = None, airports: Sequence[str] = DEFAULT_AIRPORTS, routes: Optional[Sequence[tuple]] = None, start_date: date = date(2024, 1, 1), days: int = 30, balanced: bool = False, batch_size: int = WORKLOAD_BATCH_SIZE):
+        np = require_numpy()
+
+        if days < 1:
+            raise ValueError("days must be at least 1.")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+
+        if routes is None:
+            # Traffic between two airports grows with how busy both of them are
+            rank = {airport: index + 1 for index, airport in enumerate(airports)}
+            routes = [(origin, destination) for origin in airports for destination in airports if origin != destination]
+            weights = np.array([1 / (rank[origin] * rank[destination]) for origin, destination in routes])
+        else:
+            weights = np.ones(len(routes))
+
+        if not routes:
+            raise ValueError("At least one route is needed, give two airports or more.")
+
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.seed = self.seed_sequence.entropy
+        self.routes = list(routes)
+        self.start_date = start_date
+        self.days = days
+        self.balanced = balanced
+        self.batch_size = batch_size
+
+        self.origins = np.array([origin for origin, _ in self.routes])
+        self.destinations = np.array([destination for _, destination in self.routes])
+        self.route_cdf = np.cumsum(weights) / weights.sum()
+        self.hour_cdf = np.cumsum(DEPARTURE_HOUR_WEIGHTS) / sum(DEPARTURE_HOUR_WEIGHTS)
+        self.airlines = np.array(AIRLINES)
+        self.letters = np.array(list(FLIGHT_NUMBER_LETTERS))
+
+        # Per route block time in minutes and fare level between the cheapest and dearest fare,
+        # drawn once so every flight on a route shares them
+        route_rng = self.child_rng(0)
+        self.block_minutes = route_rng.integers(45, 541, len(self.routes))
+        self.fare_levels = route_rng.uniform(0.15, 0.85, len(self.routes))
+
+    def child_rng(self, *key):
+        """
+        Returns an independent generator for `key`, derived from the seed.
+        """
+        np = require_numpy()
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=key))
+
+    def sample_batch(self, index: int, count: int, offset: int = 0) -> dict:
+        """
+        Samples batch number `index` of `count` flights, the flights starting at `offset` in the
+        workload.
+
+        Returns:
+        A dictionary of NumPy arrays keyed by column name, in WORKLOAD_COLUMNS order.
+        """
+        np = require_numpy()
+        rng = self.child_rng(1, index)
+        num_routes = len(self.routes)
+
+        if self.balanced:
+            # Round robin over every (route, day) pair
+            route_index, day = np.divmod((offset + np.arange(count)) % (num_routes * self.days), self.days)
+        else:
+            route_index = np.minimum(np.searchsorted(self.route_cdf, rng.random(count), side="right"), num_routes - 1)
+            day = rng.integers(0, self.days, count)
+
+        hour = np.minimum(np.searchsorted(self.hour_cdf, rng.random(count), side="right"), 23)
+        # Scheduled departures are on five minute marks
+        minute = rng.integers(0, 12, count) * 5
+        departure_dates = np.datetime64(self.start_date, "D") + day.astype("timedelta64[D]")
+        departure_times = departure_dates.astype("datetime64[m]") + (hour * 60 + minute).astype("timedelta64[m]")
+        duration = np.maximum(self.block_minutes[route_index] + rng.integers(-15, 16, count), 30)
+        arrival_times = departure_times + duration.astype("timedelta64[m]")
+
+        flight_numbers = np.char.add(
+            np.char.add(self.letters[rng.integers(0, 26, count)], self.letters[rng.integers(0, 26, count)]),
+            rng.integers(100, 1000, count).astype(str)
+        )
+
+        columns = {
+            "flight_number":    flight_numbers,
+            "airline":          self.airlines[rng.integers(0, len(self.airlines), count)],
+            "origin":           self.origins[route_index],
+            "destination":      self.destinations[route_index],
+            "departure_date":   departure_dates,
+            "arrival_date":     arrival_times.astype("datetime64[D]"),
+            "departure_time":   departure_times,
+            "arrival_time":     arrival_times
+        }
+
+        for name, (low, high) in SEAT_RANGES.items():
+            columns[name] = rng.integers(low, high + 1, count)
+
+        # One fare level per flight for every cabin, scattered around the route's level
+        fare_level = np.clip(self.fare_levels[route_index] + rng.normal(0, 0.1, count), 0, 1)
+        for name, (low, high) in COST_RANGES.items():
+            columns[name] = np.rint(low + fare_level * (high - low)).astype(np.int64)
+
+        # Ordered like a schedule, which also keeps index inserts local when the batch is written
+        order = np.lexsort((departure_times, columns["destination"], columns["origin"]))
+
+        return {name: columns[name][order] for name in WORKLOAD_COLUMNS}
+
+    def iter_batches(self, num_flights: int):
+        """
+        Yields the workload as column batches from `sample_batch`.
+        """
+        for index, offset in enumerate(range(0, num_flights, self.batch_size)):
+            yield self.sample_batch(index, min(self.batch_size, num_flights - offset), offset)
+
+    def iter_row_chunks(self, num_flights: int):
+        """
+        Yields the workload as lists of dictionaries of Flight column values, one list per batch.
+        """
+        for columns in self.iter_batches(num_flights):
+            yield column_rows(columns)
+
+    def write_database(self, db: Session, num_flights: int, rebuild_indexes: bool = False) -> int:
+        """
+        Inserts `num_flights` flights with one bulk INSERT per batch, in a single transaction.
+
+        On SQLite the batches go straight to the driver's executemany as tuples of preformatted
+        values, skipping SQLAlchemy's per-row parameter processing, which otherwise takes about half
+        of the load time.
+
+        With `rebuild_indexes`, the flights table's indexes are dropped before the load and created
+        again after it. Building an index once is much faster than updating it row by row, but
+        searches cannot use it meanwhile, so this is for filling a new database rather than one
+        being served. The SQLite driver commits DROP INDEX on its own, outside the load transaction,
+        so if the load fails the indexes are created again after the rollback.
+
+        Cached searches over the generated routes and days are invalidated afterwards. The writes are
+        too many to apply to the in-memory views one by one, so those are dropped and rebuilt on next use.
+
+        Returns:
+        The number of flights written.
+        """
+        flights_table = Flight.__table__
+        connection = db.connection()
+        use_driver = connection.dialect.name == "sqlite"
+        statement = insert(flights_table)
+        written = 0
+
+        try:
+            if rebuild_indexes:
+                for index in flights_table.indexes:
+                    index.drop(connection)
+
+            for columns in self.iter_batches(num_flights):
+                if use_driver:
+                    connection.exec_driver_sql(SQLITE_INSERT, sqlite_rows(columns))
+                else:
+                    db.execute(statement, column_rows(columns))
+                written += len(columns["origin"])
+
+            if rebuild_indexes:
+                for index in flights_table.indexes:
+                    index.create(connection)
+            db.commit()
+        except Exception:
+            db.rollback()
+            if rebuild_indexes:
+                restore_connection = db.connection()
+                for index in flights_table.indexes:
+                    index.create(restore_connection, checkfirst=True)
+                db.commit()
+            raise
+
+        earliest = datetime.combine(self.start_date, datetime.min.time())
+        latest = earliest + timedelta(days=self.days + 1)
+        for origin, destination in set(self.routes):
+            search_cache.invalidate(origin, destination, earliest, latest)
+        clear_route_graphs()
+        clear_fare_snapshots()
+
+        logger.info(f"Added {written} generated flights over {len(self.routes)} routes and {self.days} days")
+
+        return written
+
+    def write_csv(self, path: str, num_flights: int) -> int:
+        """
+        Writes `num_flights` flights to a CSV file with a header row, formatted like /flights/export.
+
+        Returns:
+        The number of flights written.
+        """
+        written = 0
+
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(WORKLOAD_COLUMNS)
+            for columns in self.iter_batches(num_flights):
+                writer.writerows(zip(*(column.tolist() for column in columns.values())))
+                written += len(columns["origin"])
+
+        return written
+
+    def write_parquet(self, path: str, num_flights: int) -> int:
+        """
+        Writes `num_flights` flights to a Parquet file, one row group per batch.
+
+        Raises:
+        - RuntimeError: If pyarrow is not installed.
+
+        Returns:
+        The number of flights written.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow, install it with `pip install pyarrow`")
+
+        writer = None
+        written = 0
+
+        try:
+            for columns in self.iter_batches(num_flights):
+                # Arrow timestamps have no minute unit
+                columns["departure_time"] = columns["departure_time"].astype("datetime64[s]")
+                columns["arrival_time"] = columns["arrival_time"].astype("datetime64[s]")
+
+                table = pa.table(columns)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                written += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+
+        return written
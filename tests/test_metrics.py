@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+
+from main import app
+
+# Not used as a context manager, so the lifespan (schema creation, hold reaper) does not run
+# against ./flights.db
+client = TestClient(app)
+
+def test_profile_endpoint_without_instrumented_calls():
+    response = client.get("/metrics", params={"profile": "1"})
+
+    assert response.status_code == 200
+    assert "No profiled calls" in response.text
+
+def test_profile_header_without_instrumented_calls():
+    response = client.get("/search-cache/stats", headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert "No profiled calls" in response.text
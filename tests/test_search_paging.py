@@ -0,0 +1,29 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import models
+from main import app
+from services.flight_manager import MAX_SEARCH_PAGE_SIZE, query_flight_search
+
+# Not used as a context manager, so the lifespan (schema creation, hold reaper) does not run
+# against ./flights.db
+client = TestClient(app)
+
+SEARCH = {"origin": "BOS", "destination": "MIA", "departure_date": "2024-01-18"}
+
+@pytest.mark.parametrize("path", ["/search-flights/", "/async/search-flights/"])
+@pytest.mark.parametrize("paging", [{"page_size": 0}, {"page_size": -1}, {"page_size": MAX_SEARCH_PAGE_SIZE + 1}, {"page": 0}, {"page": -1}])
+def test_search_rejects_invalid_paging(path, paging):
+    response = client.get(path, params={**SEARCH, "pagination": "cursor", **paging})
+
+    assert response.status_code == 422
+
+@pytest.mark.parametrize("pagination", ["offset", "cursor"])
+def test_search_handler_rejects_empty_pages(pagination):
+    criteria = models.FlightSearchCriteria(**SEARCH)
+
+    with pytest.raises(HTTPException) as error:
+        query_flight_search(criteria, None, page=1, page_size=0, pagination=pagination)
+
+    assert error.value.status_code == 400